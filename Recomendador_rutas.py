@@ -1,6 +1,8 @@
 import streamlit as st
-import pandas as pd
-import unicodedata
+from puntuacion_rutas import catalogo_rutas
+from indice_rutas import indice_rutas
+from rutas_similares import rutas_similares
+
 
 def app(change_page_func):
 
@@ -9,7 +11,7 @@ def app(change_page_func):
         for key in [
             "tipo_ruta_input", "popularidad_input", "dificultad_input",
             "duracion", "prioridad", "resultado_ruta",
-            "duracion_anterior", "clear_resultado"
+            "duracion_anterior", "clear_resultado", "similares_mismo_tipo"
         ]:
             st.session_state.pop(key, None)
         st.session_state.reset_rutas = False
@@ -56,29 +58,12 @@ def app(change_page_func):
 
     # --- Funciones auxiliares ---
 
-    #Normalizamos el texto según la base de datos
-    def normalizar_texto(texto):
-        return ''.join(
-            c for c in unicodedata.normalize('NFD', texto)
-            if unicodedata.category(c) != 'Mn'
-        ).lower()
-
     #Convertimos las horas en formato decimal a hh:mm
     def horas_a_hhmm(decimal_horas):
         horas = int(decimal_horas)
         minutos = int((decimal_horas - horas) * 60)
         return f"{horas}:{minutos:02d}"
 
-    # Cargamos los datos de nuestra base de datos
-    @st.cache_data
-    def cargar_datos():
-        df = pd.read_csv('baseDatos/rutas_turisticas.csv')
-        df['tipo_ruta_normalizada'] = df['tipo_ruta'].apply(normalizar_texto)
-        return df
-
-    df_rutas = cargar_datos()
-
-
     # --- Título ---
     st.title("🌍 Recomendador de Rutas Turísticas en GreenLake Village 🌍")
     st.markdown("##### Responde a nuestras preguntas para descubrir tu ruta ideal! 🧭")
@@ -194,6 +179,20 @@ def app(change_page_func):
             st.session_state.clear_resultado = True
             st.session_state.duracion_anterior = st.session_state.duracion
 
+    # --- Rutas que cumplen las respuestas dadas hasta ahora (ver indice_rutas.py) ---
+    if st.session_state.tipo_ruta_input:
+        rutas_posibles = indice_rutas().contar(
+            tipo=st.session_state.tipo_ruta_input,
+            popularidad=st.session_state.popularidad_input or None,
+            dificultad=st.session_state.dificultad_input or None,
+            duracion=st.session_state.duracion if st.session_state.dificultad_input else None
+        )
+        if rutas_posibles:
+            texto_rutas = f"🔎 <strong>{rutas_posibles}</strong> rutas cumplen todas tus respuestas"
+        else:
+            texto_rutas = "🔎 Ninguna ruta cumple todas tus respuestas: te recomendaremos la que más se acerque"
+        st.markdown(f"<p style='text-align:center; color:gray;'>{texto_rutas}</p>", unsafe_allow_html=True)
+
     # --- Pregunta 5: Prioridad de características de la ruta ---
     if st.session_state.dificultad_input:
         st.subheader("5️⃣ ¿Qué priorizas más en tu ruta?")
@@ -229,52 +228,29 @@ def app(change_page_func):
     # --- Recomendador ---
     if st.session_state.dificultad_input:
         if st.button("🔍 Recomiéndame mi Ruta"):
-            pesos = {
-                st.session_state.prioridad[0]: 3, 
-                st.session_state.prioridad[1]: 2,
-                st.session_state.prioridad[2]: 1
+            perfil = {
+                "tipo": st.session_state.tipo_ruta_input,
+                "popularidad": st.session_state.popularidad_input,
+                "dificultad": st.session_state.dificultad_input,
+                "duracion": st.session_state.duracion,
+                "prioridad": st.session_state.prioridad,
             }
+            # Puntuación de todo el catálogo a la vez (ver puntuacion_rutas.py)
+            recomendaciones = catalogo_rutas().recomendar(perfil)
 
-            tipo_ruta_norm = normalizar_texto(st.session_state.tipo_ruta_input)
-            rutas_filtradas = df_rutas[df_rutas['tipo_ruta_normalizada'] == tipo_ruta_norm]
-
-            recomendaciones = []
-            dur_min, dur_max = st.session_state.duracion
-
-            for _, ruta in rutas_filtradas.iterrows():
-                puntuacion = 0
-
-                if st.session_state.popularidad_input == 'popular' and ruta['popularidad'] >= 4.0:
-                    puntuacion += pesos['Popularidad']
-                elif st.session_state.popularidad_input == 'poco popular' and ruta['popularidad'] < 4.0:
-                    puntuacion += pesos['Popularidad']
-
-                distancia = ruta['longitud_km']
-                if st.session_state.dificultad_input == 'fácil' and distancia < 25.0:
-                    puntuacion += pesos['Dificultad']
-                elif st.session_state.dificultad_input == 'estandar' and 25.0 <= distancia <= 65.0:
-                    puntuacion += pesos['Dificultad']
-                elif st.session_state.dificultad_input == 'extremo' and distancia > 65.0:
-                    puntuacion += pesos['Dificultad']
-
-                duracion = ruta['duracion_hr']
-                if dur_min <= duracion <= dur_max:
-                    puntuacion += pesos['Duración']
-
-                recomendaciones.append((ruta, puntuacion))
-
-            recomendaciones.sort(key=lambda x: x[1], reverse=True)
-            mejor_ruta = recomendaciones[0][0]
-            duracion_ruta = horas_a_hhmm(mejor_ruta['duracion_hr'])
-
-            # Guardamos ruta recomendada en session_state para después usarla
-            st.session_state.resultado_ruta = {
-                "nombre": mejor_ruta['ruta_nombre'],
-                "tipo": mejor_ruta['tipo_ruta'],
-                "valoracion": mejor_ruta['popularidad'],
-                "distancia": mejor_ruta['longitud_km'],
-                "duracion": duracion_ruta
-            }
+            def resumen_ruta(ruta):
+                return {
+                    "nombre": ruta['ruta_nombre'],
+                    "tipo": ruta['tipo_ruta'],
+                    "valoracion": ruta['popularidad'],
+                    "distancia": ruta['longitud_km'],
+                    "duracion": horas_a_hhmm(ruta['duracion_hr']),
+                    "posicion": int(ruta.name)
+                }
+
+            # Guardamos ruta recomendada (y las siguientes mejores) en session_state para después usarla
+            mejor_ruta, *otras_rutas = [resumen_ruta(ruta) for _, ruta in recomendaciones.iterrows()]
+            st.session_state.resultado_ruta = {**mejor_ruta, "alternativas": otras_rutas}
 
 
     # --- MOSTRAR RUTA RECOMENDADA ---
@@ -294,6 +270,22 @@ def app(change_page_func):
         </div>
         """, unsafe_allow_html=True)
 
+        # Otras rutas que también encajan con las preferencias
+        if ruta.get("alternativas"):
+            st.markdown("<div style='height:2px'></div>", unsafe_allow_html=True)
+            st.markdown("##### 🧭 Otras rutas que también encajan contigo:")
+            for alternativa in ruta["alternativas"]:
+                st.markdown(f"- **{alternativa['nombre']}** ({alternativa['tipo']}) · ⭐ {alternativa['valoracion']} · "
+                            f"{alternativa['distancia']} km · {alternativa['duracion']} horas")
+
+        # Rutas parecidas a la recomendada en distancia, duración y popularidad (ver rutas_similares.py)
+        st.markdown("<div style='height:2px'></div>", unsafe_allow_html=True)
+        st.markdown("##### 🔁 Rutas parecidas a tu ruta ideal:")
+        mismo_tipo = st.checkbox("Solo rutas del mismo tipo", value=True, key="similares_mismo_tipo")
+        for _, similar in rutas_similares().similares(ruta["posicion"], mismo_tipo=mismo_tipo).iterrows():
+            st.markdown(f"- **{similar['ruta_nombre']}** ({similar['tipo_ruta']}) · ⭐ {similar['popularidad']} · "
+                        f"{similar['longitud_km']} km · {horas_a_hhmm(similar['duracion_hr'])} horas")
+
         st.markdown("<div style='height:2px'></div>", unsafe_allow_html=True)
         st.subheader("Perfecto, ya has encontrado tu ruta ideal 🎉")
         st.markdown("¿Te gustaría organizar tu viaje con nosotros y descubrir la mejor forma de llegar a tu destino? 😎")
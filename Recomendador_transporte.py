@@ -1,22 +1,19 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import unicodedata
 from datetime import date
-import joblib
+from datos import leer_tabla
+from registro_modelos import PREFERENCIAS, registro
+from tabla_transporte import consultar, predecir_lote
+from grafo_transporte import grafo_transporte, resumen_itinerario
+from componentes_transporte import componentes_transporte, normalizar_pesos
+from demanda_transporte import NOMBRES_DIAS, NOMBRES_MESES, demanda_transporte
 
 #Cargamos nuestros modelos de Clasificación y Regresión entrenados previamente con los datos de uso de transporte
+#El registro los deserializa una sola vez por proceso y los comparte entre sesiones
 def cargar_modelos(preferencia):
-    sufijo = preferencia.lower()
-    base_path = f"modelos/predictor_rutas_transportes/"
-    clf = joblib.load(f'{base_path}modelo_transporte_{sufijo}.pkl')
-    reg_time = joblib.load(f'{base_path}modelo_tiempo_{sufijo}.pkl')
-    reg_users = joblib.load(f'{base_path}modelo_usuarios_{sufijo}.pkl')
-
-    le_origen = joblib.load(f'{base_path}encoder_origen_{sufijo}.pkl')
-    le_destino = joblib.load(f'{base_path}encoder_destino_{sufijo}.pkl')
-    le_transporte = joblib.load(f'{base_path}encoder_transporte_{sufijo}.pkl')
-
-    return clf, reg_time, reg_users, le_origen, le_destino, le_transporte
+    return registro().obtener(preferencia)
 
 #Realizamos la predicción del transporte más adecuado según la ruta, fecha y preferencia del usuario (Clasificación)
 #Además, se estiman el tiempo de ese trayecto y el número de usuarios que utilizan ese transporte en esa fecha (Regresión)
@@ -25,28 +22,34 @@ def predecir_transporte(origen, destino, fecha_str, preferencia):
     mes = fecha.month
     dia_semana = fecha.dayofweek
 
-    clf, reg_time, reg_users, le_origen, le_destino, le_transporte = cargar_modelos(preferencia)
+    #Si no hay histórico directo entre las dos ciudades buscamos un itinerario con escalas en la red de transporte
+    #(None si tampoco así se puede llegar)
+    grafo = grafo_transporte()
+    if origen != destino and not grafo.conectadas(origen, destino):
+        tramos = grafo.itinerario(origen, destino, preferencia)
+        return None if tramos is None else resumen_itinerario(tramos)
 
-    origen_enc = le_origen.transform([origen])[0] if origen in le_origen.classes_ else 0
-    destino_enc = le_destino.transform([destino])[0] if destino in le_destino.classes_ else 0
-    X_input = [[origen_enc, destino_enc, mes, dia_semana]]
+    #Si la combinación está en la tabla materializada respondemos directamente desde ella
+    respuesta = consultar(preferencia, origen, destino, mes, dia_semana)
+    if respuesta is not None:
+        return respuesta
 
-    transporte_pred_enc = clf.predict(X_input)[0]
-    transporte_pred = le_transporte.inverse_transform([transporte_pred_enc])[0]
+    paquete = cargar_modelos(preferencia)
+    le_origen, le_destino = paquete.le_origen, paquete.le_destino
 
-    tiempo_estimado = reg_time.predict(X_input)[0]
-    usuarios_estimados = reg_users.predict(X_input)[0]
+    #Ciudades que los modelos no conocen (datos más nuevos que los modelos): respondemos con el histórico
+    if origen not in le_origen.classes_ or destino not in le_destino.classes_:
+        tramos = grafo.itinerario(origen, destino, preferencia)
+        return None if tramos is None else resumen_itinerario(tramos)
 
-    #Asignamos un score de sostenibilidad a cada medio de transporte
-    sostenibilidad_map = {
-        'Bicicleta': 5,
-        'Tranvía': 4,
-        'Metro': 4,
-        'Autobús': 3,
-        'Coche Compartido': 2,
-        'Avion': 1
-    }
-    eco_nivel = sostenibilidad_map.get(transporte_pred, 3)
+    origen_enc = le_origen.transform([origen])[0]
+    destino_enc = le_destino.transform([destino])[0]
+
+    transportes, tiempos, usuarios, ecos = predecir_lote(paquete, [origen_enc], [destino_enc], [mes], [dia_semana])
+    transporte_pred = transportes[0]
+    tiempo_estimado = tiempos[0]
+    usuarios_estimados = usuarios[0]
+    eco_nivel = int(ecos[0])
 
     #Devolvemos las predicciones y el nivel de sostenibilidad de nuestra opción
     return {
@@ -56,6 +59,20 @@ def predecir_transporte(origen, destino, fecha_str, preferencia):
         'sostenibilidad_nivel': eco_nivel
     }
 
+#Predicción con pesos libres (usuarios, tiempo, sostenibilidad) a partir de la tabla de componentes
+def predecir_con_pesos(origen, destino, fecha_str, pesos):
+    fecha = pd.to_datetime(fecha_str)
+
+    #Sin histórico directo buscamos el itinerario con escalas del objetivo con pesos más parecidos
+    grafo = grafo_transporte()
+    if origen != destino and not grafo.conectadas(origen, destino):
+        pesos_norm = normalizar_pesos(pesos)
+        objetivo = min(PREFERENCIAS, key=lambda o: np.abs(np.array(PREFERENCIAS[o]) - pesos_norm).sum())
+        tramos = grafo.itinerario(origen, destino, objetivo)
+        return None if tramos is None else resumen_itinerario(tramos)
+
+    return componentes_transporte().consultar(origen, destino, fecha.month, fecha.dayofweek, pesos)
+
 #Función principal de la página de recomendación de transporte
 def app(change_page_func):
     # --- CSS personalizado para los botones ---
@@ -103,8 +120,8 @@ def app(change_page_func):
     #Cargamos los datos de ciudades de origen posible
     @st.cache_data
     def cargar_ciudades():
-        df = pd.read_csv("baseDatos/uso_transporte.csv")
-        df[['origen', 'destino']] = df['ruta_popular'].str.split(' - ', expand=True)
+        df = leer_tabla("uso_transporte")
+        df[['origen', 'destino']] = df['ruta_popular'].astype(str).str.split(' - ', expand=True)
         return sorted(df['origen'].unique())
 
     ciudades_origen = [c for c in cargar_ciudades() if c != destino]
@@ -144,15 +161,40 @@ def app(change_page_func):
             if st.button("🔥 Popularidad"):
                 st.session_state.preferencia_transporte = "popularidad"
 
+        #El usuario también puede repartir él mismo el peso de cada criterio
+        with st.expander("🎚️ Prefiero repartir yo la importancia de cada criterio"):
+            col_eco, col_tiempo, col_usuarios = st.columns(3)
+            with col_eco:
+                peso_eco = st.slider("🌱 Sostenibilidad", 0, 10, 6)
+            with col_tiempo:
+                peso_tiempo = st.slider("⏱️ Eficiencia", 0, 10, 2)
+            with col_usuarios:
+                peso_usuarios = st.slider("🔥 Popularidad", 0, 10, 2)
+            if st.button("🎯 Usar mis preferencias"):
+                st.session_state.preferencia_transporte = (peso_usuarios, peso_tiempo, peso_eco)
+
         preferencia = st.session_state.preferencia_transporte
 
         #Nos indica si el usuario ha seleccionado una opción de preferencia
-        if preferencia:
+        if isinstance(preferencia, tuple):
+            pesos = normalizar_pesos(preferencia)
+            st.success(f"Has seleccionado tus propias preferencias: **{pesos[2]:.0%}** sostenibilidad, "
+                       f"**{pesos[1]:.0%}** eficiencia y **{pesos[0]:.0%}** popularidad")
+            st.session_state.resultado_transporte = predecir_con_pesos(origen, destino, str(fecha), preferencia)
+            if st.session_state.resultado_transporte is None:
+                st.warning("No hemos encontrado ninguna forma de llegar a tu destino desde esta ciudad.")
+        elif preferencia:
             st.success(f"Has seleccionado la opción: **{preferencia.capitalize()}**")
             st.session_state.resultado_transporte = predecir_transporte(origen, destino, str(fecha), preferencia)
+            if st.session_state.resultado_transporte is None:
+                st.warning("No hemos encontrado ninguna forma de llegar a tu destino desde esta ciudad.")
 
         resultado = st.session_state.get("resultado_transporte")
         if resultado:
+            #Si el trayecto no es directo añadimos las ciudades en las que hay que hacer escala
+            escalas = ""
+            if resultado.get('escalas'):
+                escalas = "\n    <li><strong>Escalas:</strong> " + ", ".join(resultado['escalas']) + "</li>"
             st.markdown("---")
             st.markdown(f"""
             <div style="background-color:#f9f9f9; padding:15px; border-radius:10px; border:1px solid #ddd;">
@@ -161,11 +203,28 @@ def app(change_page_func):
                 <li><strong>Transporte:</strong> {resultado['transporte_recomendado']}</li>
                 <li><strong>Duración estimada:</strong> {resultado['tiempo_estimado_min']} minutos</li>
                 <li><strong>Popularidad estimada:</strong> {resultado['usuarios_estimados']} usuarios</li>
-                <li><strong>Sostenibilidad:</strong> {resultado['sostenibilidad_nivel']} / 5</li>
+                <li><strong>Sostenibilidad:</strong> {resultado['sostenibilidad_nivel']} / 5</li>{escalas}
             </ul>
             </div>
             """, unsafe_allow_html=True)
 
+            #Demanda histórica del trayecto en el mismo mes y día de la semana (o en todo el histórico si no hay)
+            demanda = demanda_transporte()
+            fecha_viaje = f"los {NOMBRES_DIAS[fecha.weekday()]} de {NOMBRES_MESES[fecha.month - 1]}"
+            historico = demanda.por_transporte(origen, destino, fecha.month, fecha.weekday())
+            periodo = fecha_viaje
+            if historico.empty:
+                historico = demanda.por_transporte(origen, destino)
+                periodo = "todo el histórico"
+            if not historico.empty:
+                st.markdown(f"##### 📊 Demanda histórica del trayecto ({periodo})")
+                tabla = historico[["viajes", "usuarios_medios", "tiempo_medio"]].round(0).astype(int)
+                st.table(tabla.rename_axis("Transporte").rename(columns={
+                    "viajes": "Registros", "usuarios_medios": "Usuarios medios", "tiempo_medio": "Tiempo medio (min)"}))
+
+            with st.expander(f"🗺️ Usuarios medios entre ciudades {fecha_viaje}"):
+                st.dataframe(demanda.mapa("usuarios_medios", fecha.month, fecha.weekday()).round(0))
+
             st.markdown("<div style='height:2px'></div>", unsafe_allow_html=True)
             st.subheader("¡Felicidades, ya tienes planificada tu ruta en GreenLake Village! ⛰️💫")
             st.markdown("A continuación, vamos a proporcionarte un resumen de la recomendación de nuestro algoritmo \n\n")
@@ -186,7 +245,7 @@ def app(change_page_func):
             </div>
             """.format(
                 ruta = ruta_nombre,
-                trayecto= origen + " - " + destino,
+                trayecto=" - ".join([origen] + resultado.get('escalas', []) + [destino]),
                 transporte=resultado['transporte_recomendado'],
                 fecha=fecha.strftime('%d/%m/%Y'),
                 tiempo_trayecto=resultado['tiempo_estimado_min'],
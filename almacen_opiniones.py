@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import leer_tabla, version_tabla
+
+# Almacén de opiniones para la paginación
+# Las opiniones se ordenan una vez por servicio (y dentro de cada servicio de la más reciente a la más antigua) y
+# cada una se guarda ya renderizada en HTML. Un índice servicio -> (inicio, fin) delimita el tramo de cada servicio,
+# así que una página es un corte de ese tramo: no se filtra la tabla ni se recorre fila a fila.
+
+TABLA = "opiniones_turisticas"
+OPINIONES_POR_PAGINA = 3
+# Orden dentro de cada servicio
+ORDENES = {
+    "Más recientes": "recientes",
+    "Más antiguas": "antiguas",
+    "Orden original": "original",
+}
+
+PLANTILLA_OPINION = """
+        <div style="background-color:#e3f2fd; padding:15px; border-radius:10px; border:1px solid #90caf9; margin-bottom:10px;">
+            <p style="margin:0;"><strong>{puntuacion}⭐</strong> <span style="margin-left:8px;">🗣️</span> {comentario}</p>
+        </div>
+        """
+
+
+class AlmacenOpiniones:
+    def __init__(self, opiniones):
+        # Orden por servicio y, dentro de cada uno, de la más reciente a la más antigua (a igual fecha, la primera
+        # en la tabla)
+        posicion = np.arange(len(opiniones))
+        fechas = opiniones["fecha"].to_numpy().astype("datetime64[ns]").astype(np.int64)
+        # Códigos enteros de servicio en orden alfabético (ordenar enteros es mucho más rápido que cadenas)
+        codigos, nombres = pd.factorize(opiniones["nombre_servicio"].astype(str), sort=True)
+        orden = np.lexsort((posicion, -fechas, codigos))
+
+        self.html = np.array([
+            PLANTILLA_OPINION.format(puntuacion=puntuacion, comentario=comentario)
+            for puntuacion, comentario in zip(opiniones["puntuacion"].to_numpy()[orden].tolist(),
+                                               opiniones["comentario"].to_numpy()[orden].tolist())
+        ], dtype=object)
+
+        # Índice servicio -> (inicio, fin) sobre el orden anterior
+        codigos_ordenados = codigos[orden]
+        inicios = np.flatnonzero(np.diff(codigos_ordenados, prepend=-1))
+        fines = np.append(inicios[1:], len(orden))
+        self.tramos = {
+            str(nombres[codigo]): (int(i), int(f))
+            for codigo, i, f in zip(codigos_ordenados[inicios], inicios, fines)
+        }
+
+        # Orden original de la tabla dentro de cada tramo (posiciones sobre el orden anterior)
+        self.orden_original = np.lexsort((orden, codigos_ordenados))
+
+    def total(self, servicio):
+        inicio, fin = self.tramos.get(servicio, (0, 0))
+        return fin - inicio
+
+    def total_paginas(self, servicio, por_pagina=OPINIONES_POR_PAGINA):
+        return -(-self.total(servicio) // por_pagina)
+
+    #HTML de las opiniones de la página (empezando en 1) de un servicio
+    def pagina(self, servicio, numero, por_pagina=OPINIONES_POR_PAGINA, orden="recientes"):
+        inicio, fin = self.tramos.get(servicio, (0, 0))
+        desde = (numero - 1) * por_pagina
+        if desde < 0 or desde >= fin - inicio:
+            return []
+        hasta = min(desde + por_pagina, fin - inicio)
+        if orden == "recientes":
+            return list(self.html[inicio + desde:inicio + hasta])
+        if orden == "antiguas":
+            return list(self.html[fin - hasta:fin - desde][::-1])
+        return list(self.html[self.orden_original[inicio + desde:inicio + hasta]])
+
+
+def construir_almacen(opiniones=None):
+    return AlmacenOpiniones(leer_tabla(TABLA) if opiniones is None else opiniones)
+
+
+#Un único almacén por proceso y versión de los datos, compartido por todas las sesiones
+@st.cache_resource
+def cargar_almacen(version=None):
+    return construir_almacen()
+
+
+def almacen_opiniones():
+    return cargar_almacen(version_tabla(TABLA))
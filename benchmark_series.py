@@ -0,0 +1,55 @@
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from datos import leer_predicciones
+from series import cargar_ocupacion, predecir_ocupacion
+
+# Comparativa de los motores de predicción de series.py (Prophet y regresión de Fourier)
+# 1. Backtest: se entrena hasta el año anterior al de prueba y se mide el error frente a la ocupación real.
+# 2. 2025: se entrena con todo el histórico y se compara con las predicciones de Prophet de predicciones_hoteles_2025.csv.
+# Uso: python benchmark_series.py [--año-prueba 2024] [--sin-prophet] [--n-jobs N]
+
+
+def errores(prediccion, real):
+    diferencia = (prediccion - real).to_numpy()
+    return {"MAE": np.nanmean(np.abs(diferencia)), "RMSE": np.sqrt(np.nanmean(diferencia ** 2))}
+
+
+def cronometrar(funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    return resultado, time.perf_counter() - inicio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara los motores de predicción de ocupación.")
+    parser.add_argument("--año-prueba", type=int, default=2024, help="Año que se reserva para el backtest")
+    parser.add_argument("--sin-prophet", action="store_true", help="Omite el backtest de Prophet (el más lento)")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Procesos en paralelo para Prophet")
+    args = parser.parse_args()
+
+    df = cargar_ocupacion()
+    entrenamiento = df[df["fecha"].dt.year < args.año_prueba]
+    prueba = df[df["fecha"].dt.year == args.año_prueba]
+    real = prueba.pivot(index="fecha", columns="hotel_nombre", values="tasa_ocupacion")
+    real.columns = real.columns.astype(str)
+    inicio, fin = real.index.min(), real.index.max()
+
+    filas = []
+    motores = ["fourier"] if args.sin_prophet else ["fourier", "prophet"]
+    for motor in motores:
+        prediccion, segundos = cronometrar(lambda: predecir_ocupacion(inicio, fin, args.n_jobs, motor, entrenamiento))
+        filas.append({"prueba": f"backtest {args.año_prueba}", "motor": motor, "segundos": segundos,
+                      **errores(prediccion[real.columns], real)})
+
+    # Frente a las predicciones de Prophet ya publicadas para 2025
+    prophet_2025 = leer_predicciones(2025)
+    prophet_2025.columns = prophet_2025.columns.astype(str)
+    fourier_2025, segundos = cronometrar(
+        lambda: predecir_ocupacion(prophet_2025.index.min(), prophet_2025.index.max(), motor="fourier", df=df)
+    )
+    filas.append({"prueba": "2025 vs Prophet publicado", "motor": "fourier", "segundos": segundos,
+                  **errores(fourier_2025[prophet_2025.columns].set_axis(prophet_2025.index), prophet_2025)})
+
+    print(pd.DataFrame(filas).round(3).to_string(index=False))
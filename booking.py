@@ -2,32 +2,27 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from datos import cargar
+from buscador_opiniones import mostrar_buscador
+from almacen_opiniones import ORDENES, almacen_opiniones
+from resumen_servicios import consultar, tabla_resumen
+from resumen_comentarios import mostrar_resumen_comentarios
 
 
-opiniones = pd.read_csv('baseDatos/opiniones_turisticas.csv')
-opiniones = opiniones[opiniones['tipo_servicio'] != 'Hotel']
-
 def app(change_page_func):
+    todas_opiniones = cargar("opiniones_turisticas")
+
     st.title("Descubre qué dicen los viajeros sobre GreenLake Village ⭐🏕️")
     st.image('img/imagen_intro.png')
 
-    # Creamos un dataset con las opiniones agrupadas por servicio 
-    conteo_servicios = opiniones['nombre_servicio'].value_counts().to_dict()
-    servicios = opiniones.groupby(['nombre_servicio', 'tipo_servicio']).agg({'puntuacion': 'mean'}).reset_index()
-    servicios['num_opiniones'] = servicios['nombre_servicio'].map(conteo_servicios)
-    servicios['descripcion_servicio'] = servicios.apply(
-        lambda row: row['tipo_servicio'] if row['tipo_servicio'] in ['Hotel', 'Ruta'] else row['nombre_servicio'].split()[-1],
-        axis=1
-    )
-    servicios['descripcion_servicio'] = servicios['descripcion_servicio'].replace('Guiado', 'Tour Guiado')
-    servicios['puntuacion'] = servicios['puntuacion'].round(1)
+    # Resumen de las opiniones por servicio (materializado, ver resumen_servicios.py)
+    servicios = tabla_resumen()
+    servicios = servicios[servicios['tipo_servicio'] != 'Hotel']
     # Selección del servicio deseado
     tipos_servicios = list(servicios['descripcion_servicio'].unique())
     selected_service = st.selectbox('_Selecciona el tipo de servicio que deseas consultar 📌_',options=tipos_servicios)
-    servicios_filtered = servicios[servicios['descripcion_servicio'] == selected_service]
     # Seleccionar puntuación mínima
     min_puntuacion = st.slider("_Puntuación media mínima del servicio 💯_", min_value=0.0, max_value=5.0, value=0.0, step=0.1)
-    servicios_filtered = servicios_filtered[servicios_filtered['puntuacion'] >= min_puntuacion]
     # Ordenar por: 
     # Valor por defecto para orden si no existe
     if "orden_opiniones" not in st.session_state:
@@ -53,12 +48,8 @@ def app(change_page_func):
     # Aplicar ordenamiento según botón seleccionado
     orden = st.session_state.orden_opiniones
 
-    if orden == "Puntuación (de mayor a menor)":
-        servicios_filtered = servicios_filtered.sort_values(by="puntuacion", ascending=False)
-    elif orden == "Puntuación (de menor a mayor)":
-        servicios_filtered = servicios_filtered.sort_values(by="puntuacion", ascending=True)
-    elif orden == "Número de opiniones":
-        servicios_filtered = servicios_filtered.sort_values(by="num_opiniones", ascending=False)
+    servicios_filtered = consultar(servicios, descripcion=selected_service, puntuacion_minima=min_puntuacion,
+                                   orden=orden, decimales=1)
 
     # (Opcional: Mostrar cuál fue el último criterio aplicado)
     st.markdown(f"<p style='text-align:center; color:gray;'>Orden actual: <strong>{orden}</strong></p>", unsafe_allow_html=True)
@@ -84,15 +75,23 @@ def app(change_page_func):
     # Dar a seleccionar el Servicio 
     st.markdown("#### Opiniones completas de nuestros viajeros 🗣️")
     aux = st.selectbox("_Selecciona cualquier servicio para ver todas sus opiniones:_", servicios_filtered["nombre_servicio"])
-    opiniones_filtradas = opiniones[opiniones["nombre_servicio"] == aux]
-
-    opiniones_por_pagina = 3
-    total_opiniones = len(opiniones_filtradas)
-    total_paginas = (total_opiniones // opiniones_por_pagina) + (1 if total_opiniones % opiniones_por_pagina > 0 else 0)
+    # Palabras clave y tono de sus comentarios (calculados por lotes, ver resumen_comentarios.py)
+    mostrar_resumen_comentarios(aux)
+    # Tramo del servicio en el almacén de opiniones (ordenado por servicio, ver almacen_opiniones.py)
+    almacen = almacen_opiniones()
+    col1, col2 = st.columns(2)
+    with col1:
+        orden_opiniones = ORDENES[st.selectbox("_Orden de las opiniones_", list(ORDENES))]
+    with col2:
+        opiniones_por_pagina = st.selectbox("_Opiniones por página_", [3, 5, 10])
+    total_opiniones = almacen.total(aux)
+    total_paginas = almacen.total_paginas(aux, opiniones_por_pagina)
 
     # Inicializar sesión de Streamlit para la página actual 
     if "pagina_actual" not in st.session_state:
         st.session_state.pagina_actual = 1
+    # Al cambiar el tamaño de página (o de servicio) la página actual puede quedar fuera del nuevo total
+    st.session_state.pagina_actual = max(1, min(st.session_state.pagina_actual, total_paginas))
 
     # Botones de navegación
     col1, col2, col3, col4 = st.columns([2.5, 2, 4.5, 0.5]) 
@@ -103,27 +102,20 @@ def app(change_page_func):
         if st.button("Siguiente ➡️") and st.session_state.pagina_actual < total_paginas:
             st.session_state.pagina_actual += 1
 
-    # Calcular índices de inicio y fin para mostrar comentarios
-    indice_inicio = (st.session_state.pagina_actual - 1) * opiniones_por_pagina
-    indice_fin = indice_inicio + opiniones_por_pagina
-
     # Mostrar opiniones paginadas
     st.write(f"### Opiniones sobre {aux}: (Página {st.session_state.pagina_actual} de {total_paginas})")
 
-    for _, row in opiniones_filtradas.iloc[indice_inicio:indice_fin].iterrows():
-        opinion = row["comentario"]
-        puntuacion = row["puntuacion"]
-
-        st.markdown(f"""
-        <div style="background-color:#e3f2fd; padding:15px; border-radius:10px; border:1px solid #90caf9; margin-bottom:10px;">
-            <p style="margin:0;"><strong>{puntuacion}⭐</strong> <span style="margin-left:8px;">🗣️</span> {opinion}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    for html_opinion in almacen.pagina(aux, st.session_state.pagina_actual, opiniones_por_pagina, orden_opiniones):
+        st.markdown(html_opinion, unsafe_allow_html=True)
 
     # Desactivar botón si ya estamos en la primera o última página
     if total_opiniones == 0:
         st.warning("No hay opiniones disponibles para este servicio.")
 
+    # Buscador por palabras clave en todas las opiniones
+    st.markdown("<div style='height:5px'></div>", unsafe_allow_html=True)
+    mostrar_buscador(todas_opiniones, [tipo for tipo in todas_opiniones['tipo_servicio'].unique() if tipo != 'Hotel'])
+
     #Botón para volver al inicio
     st.markdown("<div style='height:5px'></div>", unsafe_allow_html=True)
     if st.button("🏠 Volver al Inicio"):
@@ -0,0 +1,176 @@
+import os
+import numpy as np
+import joblib
+
+# Motor de inferencia compacto para los RandomForest del predictor de transporte
+# Cada bosque entrenado se aplana en arrays contiguos de NumPy (variable, umbral e hijos de cada nodo y valores
+# de cada hoja, con todos los árboles uno detrás de otro). El predictor recorre todos los árboles a la vez para
+# un lote de filas usando solo NumPy y reproduce exactamente las salidas de sklearn.
+
+PREFIJOS_BOSQUES = ("modelo_transporte", "modelo_tiempo", "modelo_usuarios")
+# A partir de este número de filas compensa recorrer los árboles de uno en uno
+FILAS_POR_ARBOL = 64
+
+
+class BosqueCompacto:
+    def __init__(self, variable, umbral, izquierdo, derecho, hoja, valores, raices, profundidad, clases=None):
+        self.variable = variable      # variable de corte de cada nodo (negativa en las hojas)
+        self.umbral = umbral
+        self.izquierdo = izquierdo    # índices globales de los hijos
+        self.derecho = derecho
+        self.hoja = hoja              # fila de `valores` de cada hoja (-1 en los nodos internos)
+        self.valores = valores        # [hoja] en regresión, [hoja, clase] en clasificación
+        self.raices = raices          # nodo raíz de cada árbol
+        self.profundidad = int(profundidad)
+        self.clases = clases          # None en los regresores
+
+    @property
+    def n_arboles(self):
+        return len(self.raices)
+
+    #Hoja alcanzada en cada árbol por cada fila: array [árbol, fila]
+    def hojas(self, X):
+        # sklearn convierte la entrada a float32 y compara contra umbrales en float64
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        n_filas, n_variables = X.shape
+        X = X.ravel()
+        inicio_fila = np.arange(n_filas) * n_variables
+
+        # Lotes pequeños: todos los árboles a la vez. Lotes grandes: árbol a árbol (sus nodos caben en caché)
+        if n_filas < FILAS_POR_ARBOL:
+            nodos = np.repeat(self.raices.astype(np.int64), n_filas)
+            self._descender(X, np.tile(inicio_fila, self.n_arboles), nodos)
+            return nodos.reshape(self.n_arboles, n_filas)
+
+        hojas = np.empty((self.n_arboles, n_filas), dtype=np.int64)
+        for arbol, raiz in enumerate(self.raices):
+            hojas[arbol] = raiz
+            self._descender(X, inicio_fila, hojas[arbol])
+        return hojas
+
+    #Bajamos cada recorrido hasta su hoja; en cada nivel solo avanzan los que aún no han llegado
+    def _descender(self, X, inicio_fila, nodos):
+        activos = np.arange(nodos.size)
+        for _ in range(self.profundidad):
+            actuales = nodos[activos]
+            variable = self.variable[actuales]
+            interno = variable >= 0
+            activos, actuales, variable = activos[interno], actuales[interno], variable[interno]
+            if activos.size == 0:
+                break
+            a_la_izquierda = X[inicio_fila[activos] + variable] <= self.umbral[actuales]
+            nodos[activos] = np.where(a_la_izquierda, self.izquierdo[actuales], self.derecho[actuales])
+
+    #Media de los árboles acumulada en el mismo orden que sklearn (mismo resultado bit a bit)
+    def _media(self, X):
+        valores = self.valores[self.hoja[self.hojas(X)]]
+        total = np.zeros(valores.shape[1:])
+        for valores_arbol in valores:
+            total += valores_arbol
+        total /= self.n_arboles
+        return total
+
+    def predict_proba(self, X):
+        return self._media(X)
+
+    def predict(self, X):
+        media = self._media(X)
+        if self.clases is None:
+            return media
+        return self.clases.take(np.argmax(media, axis=1))
+
+    def guardar(self, ruta):
+        datos = {
+            "variable": self.variable,
+            "umbral": self.umbral,
+            "izquierdo": self.izquierdo,
+            "derecho": self.derecho,
+            "hoja": self.hoja,
+            "valores": self.valores,
+            "raices": self.raices,
+            "profundidad": np.array(self.profundidad),
+        }
+        if self.clases is not None:
+            datos["clases"] = self.clases
+        temporal = f"{ruta}.{os.getpid()}.tmp.npz"
+        np.savez(temporal, **datos)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta, allow_pickle=False) as datos:
+            return cls(
+                datos["variable"], datos["umbral"], datos["izquierdo"], datos["derecho"], datos["hoja"],
+                datos["valores"], datos["raices"], datos["profundidad"], datos["clases"] if "clases" in datos else None
+            )
+
+
+#Aplanamos un RandomForestClassifier/Regressor de sklearn en un BosqueCompacto
+def exportar_bosque(bosque):
+    arboles = [estimador.tree_ for estimador in bosque.estimators_]
+    desplazamientos = np.concatenate([[0], np.cumsum([arbol.node_count for arbol in arboles])])
+
+    def hijos(campo):
+        partes = []
+        for arbol, desplazamiento in zip(arboles, desplazamientos):
+            hijo = getattr(arbol, campo).astype(np.int32)
+            partes.append(np.where(hijo >= 0, hijo + desplazamiento, hijo))
+        return np.concatenate(partes)
+
+    variable = np.concatenate([arbol.feature for arbol in arboles])
+    es_hoja = variable < 0
+    hoja = np.full(len(variable), -1, dtype=np.int32)
+    hoja[es_hoja] = np.arange(es_hoja.sum(), dtype=np.int32)
+
+    clasificador = hasattr(bosque, "classes_")
+    if clasificador:
+        # Igual que DecisionTreeClassifier.predict_proba: cada hoja se normaliza por su suma
+        valores = np.concatenate([arbol.value[:, 0, :] for arbol in arboles])[es_hoja]
+        normalizador = valores.sum(axis=1)
+        normalizador[normalizador == 0.0] = 1.0
+        valores /= normalizador[:, None]
+    else:
+        valores = np.concatenate([arbol.value[:, 0, 0] for arbol in arboles])[es_hoja]
+
+    return BosqueCompacto(
+        variable=variable.astype(np.int8 if bosque.n_features_in_ < 128 else np.int32),
+        umbral=np.concatenate([arbol.threshold for arbol in arboles]),
+        izquierdo=hijos("children_left"),
+        derecho=hijos("children_right"),
+        hoja=hoja,
+        valores=valores,
+        raices=desplazamientos[:-1].astype(np.int32),
+        profundidad=max(arbol.max_depth for arbol in arboles),
+        clases=np.asarray(bosque.classes_) if clasificador else None,
+    )
+
+
+#Ruta del bosque compacto que acompaña a un modelo .pkl
+def ruta_compacta(ruta_pkl):
+    return os.path.splitext(ruta_pkl)[0] + ".npz"
+
+
+#El bosque compacto es válido si existe y es posterior al .pkl del que salió (o no hay .pkl)
+def compacto_vigente(ruta_pkl):
+    ruta = ruta_compacta(ruta_pkl)
+    if not os.path.exists(ruta):
+        return False
+    return not os.path.exists(ruta_pkl) or os.path.getmtime(ruta) >= os.path.getmtime(ruta_pkl)
+
+
+#Exportamos todos los bosques .pkl de un directorio
+def exportar_directorio(directorio):
+    exportados = []
+    for fichero in sorted(os.listdir(directorio)):
+        if fichero.endswith(".pkl") and fichero.startswith(PREFIJOS_BOSQUES):
+            ruta_pkl = os.path.join(directorio, fichero)
+            exportar_bosque(joblib.load(ruta_pkl)).guardar(ruta_compacta(ruta_pkl))
+            exportados.append(ruta_compacta(ruta_pkl))
+    return exportados
+
+
+if __name__ == "__main__":
+    # Exportación de los bosques del predictor de transporte: python bosque_compacto.py
+    from registro_modelos import DIR_MODELOS
+    for ruta in exportar_directorio(DIR_MODELOS):
+        print(f"{ruta}: {os.path.getsize(ruta) / 1e6:.1f} MB")
@@ -0,0 +1,265 @@
+import re
+import copy
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import leer_tabla, normalizar_texto, version_tabla
+
+# Buscador de texto completo sobre los comentarios de opiniones_turisticas
+# Índice invertido construido una vez: cada término normalizado (sin tildes, en minúsculas) tiene su lista de
+# documentos y frecuencias en arrays contiguos (formato CSR: inicio de cada término, documentos y frecuencias).
+# Las consultas se puntúan con BM25 y se pueden filtrar por tipo de servicio y puntuación mínima.
+# Las opiniones nuevas se añaden a un segmento delta en memoria que se busca junto al principal y se fusiona con
+# él cuando crece (compactar). Cuando el CSV gana filas al final solo se indexan las nuevas.
+
+TABLA = "opiniones_turisticas"
+# Parámetros de BM25
+K1 = 1.2
+B = 0.75
+# El delta se fusiona con el índice principal cuando supera esta fracción de los documentos
+FRACCION_COMPACTAR = 0.1
+
+PATRON_TERMINO = re.compile(r"\w+")
+# Columnas que se indexan (las que entran en la huella de cada opinión)
+COLUMNAS = ["comentario", "tipo_servicio", "puntuacion"]
+
+
+def tokenizar(texto):
+    return PATRON_TERMINO.findall(normalizar_texto(str(texto)))
+
+
+def huellas_opiniones(opiniones):
+    return pd.util.hash_pandas_object(opiniones[COLUMNAS], index=False).to_numpy()
+
+
+class IndiceOpiniones:
+    def __init__(self):
+        self.vocabulario = {}  # término -> id
+        # Segmento principal (CSR por término)
+        self.inicio = np.zeros(1, dtype=np.int64)
+        self.documentos = np.empty(0, dtype=np.int32)
+        self.frecuencias = np.empty(0, dtype=np.int32)
+        # Segmento delta: id de término -> listas de documentos y frecuencias
+        self.delta = {}
+        self.docs_delta = 0
+        # Atributos por documento
+        self.longitud = np.empty(0, dtype=np.int32)
+        self.tipo = np.empty(0, dtype=np.int16)
+        self.puntuacion = np.empty(0, dtype=np.float32)
+        self.filas = np.empty(0, dtype=np.int64)  # índice de la opinión en la tabla original
+        self.huellas = np.empty(0, dtype=np.uint64)  # hash de cada opinión indexada
+        self.version = None
+        self.tipos = []  # código de tipo -> tipo_servicio
+        self.frecuencia_documental = np.empty(0, dtype=np.int64)
+
+    @property
+    def n_documentos(self):
+        return len(self.longitud)
+
+    def _id_termino(self, termino):
+        id_termino = self.vocabulario.get(termino)
+        if id_termino is None:
+            id_termino = self.vocabulario[termino] = len(self.vocabulario)
+        return id_termino
+
+    def _codigo_tipo(self, tipos):
+        for tipo in pd.unique(tipos):
+            if tipo not in self.tipos:
+                self.tipos.append(tipo)
+        codigos = {tipo: i for i, tipo in enumerate(self.tipos)}
+        return np.array([codigos[tipo] for tipo in tipos], dtype=np.int16)
+
+    #Pares (término, documento, frecuencia) de un lote de textos, ordenados por término
+    def _postings(self, textos, primer_doc):
+        terminos, docs = [], []
+        longitudes = np.empty(len(textos), dtype=np.int32)
+        for i, texto in enumerate(textos):
+            tokens = tokenizar(texto)
+            longitudes[i] = len(tokens)
+            terminos.extend(self._id_termino(t) for t in tokens)
+            docs.extend([primer_doc + i] * len(tokens))
+        clave = np.array(terminos, dtype=np.int64) * (primer_doc + len(textos)) + np.array(docs, dtype=np.int64)
+        unicas, frecuencias = np.unique(clave, return_counts=True)  # ordenadas por término y documento
+        terminos, docs = np.divmod(unicas, primer_doc + len(textos))
+        return terminos, docs.astype(np.int32), frecuencias.astype(np.int32), longitudes
+
+    def _anadir_atributos(self, opiniones, longitudes):
+        self.longitud = np.concatenate([self.longitud, longitudes])
+        self.tipo = np.concatenate([self.tipo, self._codigo_tipo(opiniones["tipo_servicio"].astype(str).to_numpy())])
+        self.puntuacion = np.concatenate([self.puntuacion, opiniones["puntuacion"].to_numpy(dtype=np.float32)])
+        self.filas = np.concatenate([self.filas, opiniones.index.to_numpy(dtype=np.int64)])
+        self.huellas = np.concatenate([self.huellas, huellas_opiniones(opiniones)])
+
+    #Construcción completa del segmento principal
+    def construir(self, opiniones):
+        terminos, docs, frecuencias, longitudes = self._postings(opiniones["comentario"].to_numpy(), 0)
+        self.inicio = np.zeros(len(self.vocabulario) + 1, dtype=np.int64)
+        np.add.at(self.inicio, terminos + 1, 1)
+        self.inicio = np.cumsum(self.inicio)
+        self.documentos, self.frecuencias = docs, frecuencias
+        self._anadir_atributos(opiniones, longitudes)
+        self.frecuencia_documental = np.diff(self.inicio)
+        return self
+
+    #Alta incremental: las opiniones nuevas van al segmento delta (coste proporcional a lo añadido)
+    def anadir(self, opiniones):
+        if len(opiniones) == 0:
+            return self
+        terminos, docs, frecuencias, longitudes = self._postings(opiniones["comentario"].to_numpy(), self.n_documentos)
+        self._anadir_atributos(opiniones, longitudes)
+        self.docs_delta += len(opiniones)
+
+        nueva_df = np.zeros(len(self.vocabulario), dtype=np.int64)
+        nueva_df[:len(self.frecuencia_documental)] = self.frecuencia_documental
+        np.add.at(nueva_df, terminos, 1)
+        self.frecuencia_documental = nueva_df
+
+        cortes = np.flatnonzero(np.diff(terminos)) + 1
+        for grupo_docs, grupo_frec, termino in zip(np.split(docs, cortes), np.split(frecuencias, cortes),
+                                                   terminos[np.concatenate([[0], cortes])] if len(terminos) else []):
+            anteriores = self.delta.get(int(termino))
+            if anteriores is None:
+                self.delta[int(termino)] = (grupo_docs, grupo_frec)
+            else:
+                self.delta[int(termino)] = (np.concatenate([anteriores[0], grupo_docs]),
+                                            np.concatenate([anteriores[1], grupo_frec]))
+
+        if self.docs_delta > FRACCION_COMPACTAR * self.n_documentos:
+            self.compactar()
+        return self
+
+    #Fusión del segmento delta con el principal
+    def compactar(self):
+        if not self.delta:
+            self.docs_delta = 0
+            return self
+        n_terminos = len(self.vocabulario)
+        principales = np.repeat(np.arange(len(self.inicio) - 1), np.diff(self.inicio))
+        terminos_delta = np.concatenate([np.full(len(d), t) for t, (d, _) in self.delta.items()])
+        terminos = np.concatenate([principales, terminos_delta])
+        docs = np.concatenate([self.documentos] + [d for d, _ in self.delta.values()])
+        frecuencias = np.concatenate([self.frecuencias] + [f for _, f in self.delta.values()])
+
+        orden = np.lexsort((docs, terminos))
+        self.documentos, self.frecuencias = docs[orden], frecuencias[orden]
+        self.inicio = np.concatenate([[0], np.cumsum(np.bincount(terminos, minlength=n_terminos))])
+        self.delta = {}
+        self.docs_delta = 0
+        return self
+
+    #Lista de documentos y frecuencias de un término (segmento principal + delta)
+    def postings(self, id_termino):
+        if id_termino < len(self.inicio) - 1:
+            docs = self.documentos[self.inicio[id_termino]:self.inicio[id_termino + 1]]
+            frecuencias = self.frecuencias[self.inicio[id_termino]:self.inicio[id_termino + 1]]
+        else:
+            docs = frecuencias = np.empty(0, dtype=np.int32)
+        if id_termino in self.delta:
+            docs_delta, frec_delta = self.delta[id_termino]
+            docs, frecuencias = np.concatenate([docs, docs_delta]), np.concatenate([frecuencias, frec_delta])
+        return docs, frecuencias
+
+    #Opiniones más relevantes para la consulta: DataFrame con la fila original de cada opinión y su puntuación BM25
+    def buscar(self, consulta, tipos=None, puntuacion_minima=None, limite=20):
+        n = self.n_documentos
+        puntuaciones = np.zeros(n)
+        longitud_media = self.longitud.mean() if n else 0.0
+        normalizacion = K1 * (1 - B + B * self.longitud / max(longitud_media, 1e-9))
+
+        for termino in dict.fromkeys(tokenizar(consulta)):
+            id_termino = self.vocabulario.get(termino)
+            if id_termino is None:
+                continue
+            docs, frecuencias = self.postings(id_termino)
+            df = self.frecuencia_documental[id_termino]
+            idf = np.log(1 + (n - df + 0.5) / (df + 0.5))
+            puntuaciones[docs] += idf * frecuencias * (K1 + 1) / (frecuencias + normalizacion[docs])
+
+        candidatos = puntuaciones > 0
+        if tipos is not None:
+            codigos = [self.tipos.index(t) for t in tipos if t in self.tipos]
+            candidatos &= np.isin(self.tipo, codigos)
+        if puntuacion_minima is not None:
+            candidatos &= self.puntuacion >= puntuacion_minima
+
+        docs = np.flatnonzero(candidatos)
+        if len(docs) > limite:
+            docs = docs[np.argpartition(-puntuaciones[docs], limite - 1)[:limite]]
+        # Mayor puntuación primero; a igualdad, el documento más antiguo en el índice
+        docs = docs[np.lexsort((docs, -puntuaciones[docs]))]
+        return pd.DataFrame({"fila": self.filas[docs], "bm25": puntuaciones[docs]})
+
+    #Copia que comparte los arrays (anadir y compactar nunca los modifican, los sustituyen)
+    def copia(self):
+        indice = copy.copy(self)
+        indice.vocabulario, indice.delta, indice.tipos = dict(self.vocabulario), dict(self.delta), list(self.tipos)
+        return indice
+
+    #Índice al día con la tabla, sin tocar este (puede estar usándolo otra sesión): si las opiniones ya indexadas
+    #siguen igual al principio solo se añaden las nuevas; si no, se construye uno nuevo
+    def actualizar(self, opiniones, version=None):
+        n = self.n_documentos
+        if n and len(opiniones) >= n and np.array_equal(huellas_opiniones(opiniones.iloc[:n]), self.huellas):
+            indice = self.copia().anadir(opiniones.iloc[n:])
+        else:
+            indice = IndiceOpiniones().construir(opiniones)
+        indice.version = version
+        return indice
+
+
+def construir_indice(opiniones=None):
+    opiniones = leer_tabla(TABLA) if opiniones is None else opiniones
+    return IndiceOpiniones().construir(opiniones)
+
+
+class RegistroBuscador:
+    def __init__(self):
+        self.indice = IndiceOpiniones()
+        self._cerrojo = threading.Lock()
+
+    #Índice al día con la versión actual de opiniones_turisticas
+    def obtener(self):
+        version = version_tabla(TABLA)
+        with self._cerrojo:
+            if self.indice.version != version:
+                self.indice = self.indice.actualizar(leer_tabla(TABLA), version)
+            return self.indice
+
+
+#Un único registro por proceso (compartido por todas las sesiones): cuando cambia la versión de los datos el índice
+#se extiende con las opiniones nuevas en lugar de construirse otro desde cero
+@st.cache_resource
+def registro_buscador():
+    return RegistroBuscador()
+
+
+def indice_opiniones():
+    return registro_buscador().obtener()
+
+
+#Buscador de opiniones para las páginas: caja de texto, filtros y las opiniones más relevantes
+def mostrar_buscador(opiniones, tipos_defecto, clave="consulta_opiniones", limite=10):
+    st.markdown("#### 🔎 Busca en las opiniones de los viajeros")
+    consulta = st.text_input("_Escribe las palabras que quieres buscar:_", key=clave)
+    if not consulta:
+        return
+    indice = indice_opiniones()
+    col1, col2 = st.columns(2)
+    with col1:
+        tipos = st.multiselect("_Tipo de servicio_", indice.tipos, default=[t for t in tipos_defecto if t in indice.tipos],
+                               key=f"{clave}_tipos")
+    with col2:
+        puntuacion_minima = st.slider("_Puntuación mínima de la opinión_", min_value=1, max_value=5, value=1,
+                                      key=f"{clave}_puntuacion")
+    resultados = indice.buscar(consulta, tipos, puntuacion_minima, limite=limite)
+
+    if resultados.empty:
+        st.info("No se han encontrado opiniones con esas palabras.")
+    for _, row in opiniones.loc[resultados["fila"]].iterrows():
+        st.markdown(f"""
+        <div style="background-color:#e3f2fd; padding:15px; border-radius:10px; border:1px solid #90caf9; margin-bottom:10px;">
+            <p style="margin:0;"><strong>{row["nombre_servicio"]}</strong> ({row["tipo_servicio"]})</p>
+            <p style="margin:0;"><strong>{row["puntuacion"]}⭐</strong> <span style="margin-left:8px;">🗣️</span> {row["comentario"]}</p>
+        </div>
+        """, unsafe_allow_html=True)
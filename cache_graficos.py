@@ -0,0 +1,98 @@
+import io
+import threading
+from collections import OrderedDict
+import matplotlib.pyplot as plt
+import streamlit as st
+
+# Caché de gráficos ya renderizados
+# Las páginas de Streamlit vuelven a ejecutarse en cada interacción y dibujar con seaborn/matplotlib es lo que más
+# tarda. Aquí se guardan los bytes del PNG de cada gráfico con una clave (tipo, hotel, año, mes, métrica, versión de
+# los datos): si la misma figura se vuelve a pedir se sirve la imagen sin dibujarla. La caché es LRU y está acotada
+# en bytes, y es única por proceso (compartida entre sesiones).
+
+TAMAÑO_MAXIMO = 64 * 1024 * 1024  # bytes
+# Mismo renderizado que st.pyplot
+OPCIONES_GUARDADO = {"format": "png", "bbox_inches": "tight", "dpi": 200}
+
+
+#Clave de un gráfico; `extra` recoge lo que distinga gráficos del mismo tipo (p. ej. el hotel comparado)
+def clave_grafico(tipo, hotel=None, año=None, mes=None, metrica=None, version=None, **extra):
+    return (tipo, hotel, año, mes, metrica, version, tuple(sorted(extra.items())))
+
+
+#Bytes del PNG de una figura (la figura se cierra después)
+def renderizar(fig, **opciones):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **{**OPCIONES_GUARDADO, **opciones})
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+class CacheGraficos:
+    def __init__(self, tamaño_maximo=TAMAÑO_MAXIMO):
+        self.tamaño_maximo = tamaño_maximo
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self._imagenes = OrderedDict()
+        self._cerrojo = threading.Lock()
+
+    #Imagen de la clave; si no está se dibuja con construir() (que devuelve una figura) y se guarda
+    def obtener(self, clave, construir):
+        with self._cerrojo:
+            imagen = self._imagenes.get(clave)
+            if imagen is not None:
+                self._imagenes.move_to_end(clave)
+                self.aciertos += 1
+                return imagen
+            self.fallos += 1
+
+        # Cada gráfico se dibuja con los parámetros de estilo por defecto, sin heredar los de otra página
+        with plt.rc_context():
+            imagen = renderizar(construir())
+        self.guardar(clave, imagen)
+        return imagen
+
+    def guardar(self, clave, imagen):
+        with self._cerrojo:
+            anterior = self._imagenes.pop(clave, None)
+            if anterior is not None:
+                self.bytes -= len(anterior)
+            if len(imagen) > self.tamaño_maximo:
+                return
+            self._imagenes[clave] = imagen
+            self.bytes += len(imagen)
+            # Expulsamos las menos usadas recientemente hasta volver al tamaño máximo
+            while self.bytes > self.tamaño_maximo:
+                _, expulsada = self._imagenes.popitem(last=False)
+                self.bytes -= len(expulsada)
+                self.expulsiones += 1
+
+    def vaciar(self):
+        with self._cerrojo:
+            self._imagenes.clear()
+            self.bytes = 0
+
+    def estadisticas(self):
+        with self._cerrojo:
+            peticiones = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._imagenes),
+                "bytes": self.bytes,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / peticiones if peticiones else 0.0,
+                "expulsiones": self.expulsiones,
+            }
+
+
+#Una única caché por proceso, compartida por todas las sesiones
+@st.cache_resource
+def cache_graficos():
+    return CacheGraficos()
+
+
+#Muestra el gráfico de la clave, dibujándolo solo si no está en la caché
+def mostrar_grafico(clave, construir):
+    st.image(cache_graficos().obtener(clave, construir), width="stretch")
@@ -0,0 +1,212 @@
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import DIR_CACHE, leer_tabla, version_tabla
+from tabla_transporte import SOSTENIBILIDAD_TRANSPORTE
+from registro_modelos import PREFERENCIAS
+
+# Predictor de transporte con los pesos que elija el usuario
+# Las preferencias eco / eficiencia / popularidad tienen cada una sus modelos entrenados; para cualquier otro reparto
+# de pesos se usa esta tabla. Para cada trayecto con histórico, mes, día de la semana y transporte candidato se
+# guardan los usuarios y el tiempo normalizados (como en el entrenamiento: sobre los máximos del histórico) y el
+# nivel de sostenibilidad de cada transporte. El score del entrenamiento (alpha * usuarios + beta * (1 - tiempo) +
+# gamma * sostenibilidad / 5) se calcula con los pesos del usuario y el transporte recomendado es su argmax.
+# Los componentes son medias del histórico. Casi todas las celdas (trayecto, transporte, mes, día) tienen un solo
+# registro, así que cada nivel se encoge hacia el nivel superior (día -> mes -> trayecto -> transporte) con
+# PESO_PREVIO registros ficticios: un registro suelto no decide por sí solo la recomendación.
+
+TABLA = "uso_transporte"
+RUTA_COMPONENTES = os.path.join(DIR_CACHE, "componentes_transporte.npz")
+MESES = 12
+DIAS_SEMANA = 7
+# Registros ficticios con la media del nivel superior que se suman a cada nivel
+PESO_PREVIO = 10
+
+
+#Pesos (usuarios, tiempo, sostenibilidad) escalados para que sumen 1 (a partes iguales si todos son 0)
+def normalizar_pesos(pesos):
+    pesos = np.asarray(pesos, dtype=float)
+    total = pesos.sum()
+    return pesos / total if total > 0 else np.full(len(pesos), 1 / len(pesos))
+
+
+#Media de cada grupo encogida hacia la media de su grupo padre: (suma + k * previa) / (registros + k)
+def media_encogida(suma, cuenta, previa, peso_previo=PESO_PREVIO):
+    return (suma + peso_previo * previa) / (cuenta + peso_previo)
+
+
+class ComponentesTransporte:
+    def __init__(self, origenes, destinos, transportes, usuarios, tiempo, disponible, usuarios_max, tiempo_max):
+        self.origenes, self.destinos = origenes, destinos  # origen y destino de cada trayecto
+        self.trayectos = {(str(o), str(d)): p for p, (o, d) in enumerate(zip(origenes, destinos))}
+        self.transportes = transportes
+        # Arrays [trayecto, mes - 1, día de la semana, transporte]
+        self.usuarios = usuarios
+        self.tiempo = tiempo
+        self.sostenibilidad = np.array([SOSTENIBILIDAD_TRANSPORTE.get(str(t), 3) for t in transportes], dtype=np.int8)
+        # Transportes con histórico en cada trayecto [trayecto, transporte]; los demás no compiten en el argmax
+        self.disponible = disponible
+        self.usuarios_max = float(usuarios_max)
+        self.tiempo_max = float(tiempo_max)
+
+    #Medias encogidas del histórico por trayecto, transporte, mes y día de la semana
+    @classmethod
+    def desde_uso(cls, uso, peso_previo=PESO_PREVIO):
+        # Se separan solo los trayectos distintos, no cada fila
+        ruta, rutas = pd.factorize(uso["ruta_popular"].astype(str), sort=True)
+        pares = pd.Series(rutas).str.split(" - ", n=1, expand=True)
+        transporte, transportes = pd.factorize(uso["tipo_transporte"].astype(str), sort=True)
+        fecha = pd.DatetimeIndex(pd.to_datetime(uso["fecha"]))
+        mes, dia = fecha.month.to_numpy() - 1, fecha.dayofweek.to_numpy()
+        n_rutas, n_transportes = len(rutas), len(transportes)
+        usuarios_max = uso["num_usuarios"].max()
+        tiempo_max = uso["tiempo_viaje_promedio_min"].max()
+
+        # Claves de cada nivel: transporte, trayecto × transporte, × mes, × día de la semana
+        claves = [transporte, ruta * n_transportes + transporte]
+        claves.append(claves[-1] * MESES + mes)
+        claves.append(claves[-1] * DIAS_SEMANA + dia)
+        formas = [(n_transportes,), (n_rutas, n_transportes), (n_rutas, n_transportes, MESES),
+                  (n_rutas, n_transportes, MESES, DIAS_SEMANA)]
+        cuentas = [np.bincount(clave, minlength=np.prod(forma)).reshape(forma) for clave, forma in zip(claves, formas)]
+
+        componentes = []
+        for valores in (uso["num_usuarios"] / usuarios_max, uso["tiempo_viaje_promedio_min"] / tiempo_max):
+            valores = valores.to_numpy(dtype=float)
+            media = valores.mean()
+            for nivel, (clave, forma, cuenta) in enumerate(zip(claves, formas, cuentas)):
+                if nivel >= 2:
+                    media = media[..., None]  # la media del nivel superior para cada mes / día
+                suma = np.bincount(clave, weights=valores, minlength=np.prod(forma)).reshape(forma)
+                media = media_encogida(suma, cuenta, media, peso_previo)
+            # [trayecto, transporte, mes, día] -> [trayecto, mes, día, transporte]
+            componentes.append(np.moveaxis(media, 1, -1).astype(np.float32))
+
+        return cls(pares[0].to_numpy(dtype=str), pares[1].to_numpy(dtype=str), transportes.to_numpy(dtype=str),
+                   componentes[0], componentes[1], cuentas[1] > 0, usuarios_max, tiempo_max)
+
+    #Score de cada transporte candidato con unos pesos (-inf si no hay histórico de ese transporte en el trayecto)
+    def puntuar(self, pesos, clave=()):
+        alfa, beta, gamma = normalizar_pesos(pesos)
+        score = (alfa * self.usuarios[clave] + beta * (1 - self.tiempo[clave]) +
+                 gamma * self.sostenibilidad / 5)
+        disponible = np.broadcast_to(self.disponible[:, None, None, :], self.usuarios.shape)[clave]
+        return np.where(disponible, score, -np.inf)
+
+    #Mejor transporte de todas las combinaciones con unos pesos: array [trayecto, mes - 1, día de la semana]
+    def mejores(self, pesos):
+        return np.argmax(self.puntuar(pesos), axis=-1)
+
+    def consultar(self, origen, destino, mes, dia_semana, pesos):
+        p = self.trayectos.get((origen, destino))
+        if p is None:
+            return None
+        clave = (p, mes - 1, dia_semana)
+        t = int(np.argmax(self.puntuar(pesos, clave)))
+        return {
+            'transporte_recomendado': str(self.transportes[t]),
+            'tiempo_estimado_min': int(round(self.tiempo[clave][t] * self.tiempo_max)),
+            'usuarios_estimados': int(self.usuarios[clave][t] * self.usuarios_max),
+            'sostenibilidad_nivel': int(self.sostenibilidad[t])
+        }
+
+    def datos(self):
+        return {
+            "origenes": self.origenes, "destinos": self.destinos, "transportes": self.transportes,
+            "usuarios": self.usuarios, "tiempo": self.tiempo, "disponible": self.disponible,
+            "usuarios_max": self.usuarios_max, "tiempo_max": self.tiempo_max,
+        }
+
+
+#Acierto por trayecto con datos no vistos: la tabla se construye con el resto de registros y, para cada preferencia,
+#se compara su argmax en cada (mes, día) del trayecto con el transporte de mejor score según las medias de los
+#registros apartados. `azar` es el acierto esperado eligiendo al azar entre los candidatos
+def validar(uso, fraccion_prueba=0.2, semilla=42, peso_previo=PESO_PREVIO):
+    prueba = np.random.default_rng(semilla).random(len(uso)) < fraccion_prueba
+    componentes = ComponentesTransporte.desde_uso(uso[~prueba], peso_previo)
+    apartados = uso[prueba].assign(
+        trayecto=uso["ruta_popular"].astype(str), transporte=uso["tipo_transporte"].astype(str),
+        usuarios=uso["num_usuarios"] / componentes.usuarios_max,
+        tiempo=uso["tiempo_viaje_promedio_min"] / componentes.tiempo_max)
+    medias = apartados.groupby(["trayecto", "transporte"])[["usuarios", "tiempo"]].mean()
+    indice_transporte = {str(t): i for i, t in enumerate(componentes.transportes)}
+
+    filas = []
+    for preferencia, pesos in PREFERENCIAS.items():
+        alfa, beta, gamma = normalizar_pesos(pesos)
+        aciertos, azar = [], []
+        for trayecto, grupo in medias.groupby(level="trayecto"):
+            p = componentes.trayectos.get(tuple(trayecto.split(" - ", 1)))
+            if p is None:
+                continue
+            # Solo compiten los transportes con registros en los dos conjuntos
+            candidatos = [indice_transporte[t] for t in grupo.index.get_level_values("transporte")
+                          if t in indice_transporte and componentes.disponible[p, indice_transporte[t]]]
+            if len(candidatos) < 2:
+                continue
+            grupo = grupo.loc[trayecto].loc[componentes.transportes[candidatos]]
+            score = (alfa * grupo["usuarios"] + beta * (1 - grupo["tiempo"]) +
+                     gamma * componentes.sostenibilidad[candidatos] / 5).to_numpy()
+            restringido = np.where(np.isin(np.arange(len(componentes.transportes)), candidatos),
+                                   componentes.puntuar(pesos, (p,)), -np.inf).argmax(axis=-1)
+            aciertos.append((restringido == candidatos[int(np.argmax(score))]).mean())
+            azar.append(1 / len(candidatos))
+        filas.append({"preferencia": preferencia, "acierto": np.mean(aciertos), "azar": np.mean(azar),
+                      "trayectos": len(aciertos)})
+    return pd.DataFrame(filas).set_index("preferencia")
+
+
+def construir_componentes(uso=None):
+    return ComponentesTransporte.desde_uso(leer_tabla(TABLA) if uso is None else uso)
+
+
+def guardar(componentes, version, ruta=RUTA_COMPONENTES):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp.npz"
+    np.savez(temporal, version=version, **componentes.datos())
+    os.replace(temporal, ruta)
+
+
+#Tabla guardada en disco si es de la versión actual de los datos; si no, se recalcula y se guarda
+def componentes_guardados(forzar=False):
+    version = version_tabla(TABLA)
+    if not forzar and os.path.exists(RUTA_COMPONENTES):
+        with np.load(RUTA_COMPONENTES, allow_pickle=False) as datos:
+            datos = dict(datos)
+        if int(datos.pop("version")) == version:
+            return ComponentesTransporte(**datos)
+    componentes = construir_componentes()
+    guardar(componentes, version)
+    return componentes
+
+
+#Una única tabla por proceso y versión de los datos, compartida por todas las sesiones
+@st.cache_resource
+def cargar_componentes(version=None):
+    return componentes_guardados()
+
+
+def componentes_transporte():
+    return cargar_componentes(version_tabla(TABLA))
+
+
+if __name__ == "__main__":
+    # Validación y caché de la tabla: python componentes_transporte.py [--datos CSV] [--semilla S]
+    import argparse
+    parser = argparse.ArgumentParser(description="Valida la tabla de componentes y la guarda en la caché.")
+    parser.add_argument("--datos", default=None, help="CSV de uso de transporte (por defecto, la base de datos)")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de los registros apartados")
+    args = parser.parse_args()
+
+    # Acierto del transporte recomendado en cada trayecto frente al mejor según los registros apartados
+    validacion = validar(leer_tabla(TABLA) if args.datos is None else pd.read_csv(args.datos), semilla=args.semilla)
+    print(validacion.to_string(float_format="{:.3f}".format))
+    for preferencia, fila in validacion.iterrows():
+        if fila["acierto"] <= fila["azar"]:
+            print(f"Aviso: la tabla no mejora el azar para la preferencia {preferencia}")
+
+    # La aplicación construye la tabla con su propia base de datos: con otro CSV solo se valida
+    if args.datos is None:
+        componentes_guardados(forzar=True)
+        print(RUTA_COMPONENTES)
@@ -0,0 +1,132 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import DIR_CACHE, leer_tabla, version_tabla
+
+# Cubo denso hotel × día × métrica
+# sostenibilidad_ocupacion.csv es la unión (ya limpia) de ocupacion_hotelera.csv y datos_sostenibilidad.csv,
+# así que de ella salen todas las métricas diarias de los hoteles. El cubo se guarda como un .npy que se abre
+# con memoria mapeada: todas las sesiones del nodo comparten las mismas páginas y cortar un hotel o un rango
+# de fechas es una vista sin copias ni máscaras sobre 54k filas.
+
+TABLA_ORIGEN = "sostenibilidad_ocupacion"
+METRICAS = [
+    "tasa_ocupacion",
+    "reservas_confirmadas",
+    "cancelaciones",
+    "precio_promedio_noche",
+    "consumo_energia_kwh",
+    "residuos_generados_kg",
+    "porcentaje_reciclaje",
+    "uso_agua_m3",
+]
+
+RUTA_VALORES = os.path.join(DIR_CACHE, "cubo_hotel_dia.npy")
+RUTA_EJES = os.path.join(DIR_CACHE, "cubo_hotel_dia.json")
+
+
+class CuboHotelDia:
+    def __init__(self, valores, hoteles, fecha_inicio, metricas):
+        self.valores = valores  # [hotel_id, dia, metrica]
+        self.hoteles = list(hoteles)
+        self.metricas = list(metricas)
+        self.fecha_inicio = pd.Timestamp(fecha_inicio)
+        self.fechas = pd.date_range(self.fecha_inicio, periods=valores.shape[1], freq="D")
+        self.indice_hotel = {hotel: i for i, hotel in enumerate(self.hoteles)}
+        self.indice_metrica = {metrica: i for i, metrica in enumerate(self.metricas)}
+
+    #Posición de una fecha en el eje de días (aritmética de fechas, sin búsquedas)
+    def indice_dia(self, fecha):
+        return (pd.Timestamp(fecha) - self.fecha_inicio).days
+
+    #Rango [desde, hasta] de fechas (ambas incluidas) como slice del eje de días
+    def dias(self, desde=None, hasta=None):
+        inicio = 0 if desde is None else max(self.indice_dia(desde), 0)
+        fin = self.valores.shape[1] if hasta is None else max(self.indice_dia(hasta) + 1, 0)
+        return slice(inicio, fin)
+
+    #Vista [dia, metrica] de un hotel
+    def hotel(self, hotel, desde=None, hasta=None):
+        return self.valores[self.indice_hotel[hotel], self.dias(desde, hasta)]
+
+    #Vista [hotel, dia] de una métrica
+    def metrica(self, metrica, desde=None, hasta=None):
+        return self.valores[:, self.dias(desde, hasta), self.indice_metrica[metrica]]
+
+    #Vista [dia] de una métrica para un hotel
+    def serie(self, hotel, metrica, desde=None, hasta=None):
+        return self.valores[self.indice_hotel[hotel], self.dias(desde, hasta), self.indice_metrica[metrica]]
+
+    #DataFrame de un hotel con la fecha como columna (mismo formato que los CSV)
+    def marco(self, hotel, desde=None, hasta=None, metricas=None):
+        metricas = self.metricas if metricas is None else metricas
+        dias = self.dias(desde, hasta)
+        vista = self.valores[self.indice_hotel[hotel], dias]
+        df = pd.DataFrame({m: vista[:, self.indice_metrica[m]] for m in metricas})
+        df.insert(0, "fecha", self.fechas[dias])
+        return df
+
+
+#Construimos el cubo a partir de la tabla tipada y lo escribimos en disco
+def construir_cubo(forzar=False):
+    version = version_tabla(TABLA_ORIGEN)
+    if not forzar and os.path.exists(RUTA_VALORES) and os.path.exists(RUTA_EJES):
+        with open(RUTA_EJES, encoding="utf-8") as f:
+            if json.load(f).get("version") == version:
+                return
+
+    df = leer_tabla(TABLA_ORIGEN)
+    hoteles = sorted(df["hotel_nombre"].unique())
+    fecha_inicio = df["fecha"].min()
+    n_dias = (df["fecha"].max() - fecha_inicio).days + 1
+
+    id_hotel = pd.Categorical(df["hotel_nombre"], categories=hoteles).codes
+    id_dia = (df["fecha"] - fecha_inicio).dt.days.to_numpy()
+
+    # Los huecos (hotel sin datos ese día) quedan como NaN
+    valores = np.full((len(hoteles), n_dias, len(METRICAS)), np.nan)
+    valores[id_hotel, id_dia] = df[METRICAS].to_numpy(dtype=float)
+
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    temporal = f"{RUTA_VALORES}.{os.getpid()}.tmp.npy"
+    np.save(temporal, valores)
+    os.replace(temporal, RUTA_VALORES)
+
+    ejes = {
+        "version": version,
+        "hoteles": [str(h) for h in hoteles],
+        "fecha_inicio": fecha_inicio.strftime("%Y-%m-%d"),
+        "metricas": METRICAS,
+    }
+    temporal = f"{RUTA_EJES}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(ejes, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, RUTA_EJES)
+
+
+#Abrimos el cubo en modo memoria mapeada (solo lectura)
+def abrir_cubo():
+    construir_cubo()
+    with open(RUTA_EJES, encoding="utf-8") as f:
+        ejes = json.load(f)
+    valores = np.load(RUTA_VALORES, mmap_mode="r")
+    return CuboHotelDia(valores, ejes["hoteles"], ejes["fecha_inicio"], ejes["metricas"])
+
+
+#Un único cubo por proceso, compartido por todas las sesiones
+@st.cache_resource
+def cargar_cubo(version=None):
+    return abrir_cubo()
+
+
+def cubo():
+    return cargar_cubo(version_tabla(TABLA_ORIGEN))
+
+
+if __name__ == "__main__":
+    # Construcción del cubo: python cubo_metricas.py
+    construir_cubo(forzar=True)
+    c = abrir_cubo()
+    print(f"{RUTA_VALORES}: {c.valores.shape} ({c.valores.nbytes / 1e6:.1f} MB)")
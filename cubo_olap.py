@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import version_tabla
+from cubo_metricas import TABLA_ORIGEN, cubo
+
+# Cubo OLAP de las métricas diarias de los hoteles
+# Agregados (suma, número de días con dato, mínimo y máximo) de cada métrica por (hotel, año, mes, día de la semana),
+# con el total de todos los hoteles y de todos los años como una posición más de sus ejes ("Todos"). Se construye
+# en una pasada sobre el cubo hotel × día (cubo_metricas.py): los días se ordenan por celda y cada agregado es un
+# único reduceat. Cualquier media por mes, por día de la semana o global sale de sumas de estas celdas.
+
+TODOS = "Todos"
+# Nombres en inglés, como los que daba strftime("%B") / strftime("%A") en la página de visualización
+MESES = ["January", "February", "March", "April", "May", "June",
+         "July", "August", "September", "October", "November", "December"]
+DIAS_SEMANA = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+class CuboOLAP:
+    def __init__(self, hoteles, años, metricas, suma, cuenta, minimo, maximo):
+        # Ejes [hotel (+Todos), año (+Todos), mes, día de la semana, métrica]
+        self.hoteles = list(hoteles)
+        self.años = list(años)
+        self.metricas = list(metricas)
+        self.suma = suma
+        self.cuenta = cuenta
+        self.minimo = minimo
+        self.maximo = maximo
+        self.indice_hotel = {hotel: i for i, hotel in enumerate(self.hoteles + [TODOS])}
+        self.indice_año = {año: i for i, año in enumerate(self.años + [TODOS])}
+        self.indice_metrica = {metrica: i for i, metrica in enumerate(self.metricas)}
+
+    #Celdas [mes, día de la semana] de un hotel y año ("Todos" en cualquiera de los dos para el total)
+    def celdas(self, agregado, metrica, hotel=TODOS, año=TODOS):
+        return agregado[self.indice_hotel[hotel], self.indice_año[año], :, :, self.indice_metrica[metrica]]
+
+    #Media sumando celdas: `eje` 0 agrupa por mes, 1 por día de la semana y None da la media global
+    def _media(self, metrica, hotel, año, eje, mes=None):
+        suma = self.celdas(self.suma, metrica, hotel, año)
+        cuenta = self.celdas(self.cuenta, metrica, hotel, año)
+        if mes is not None:
+            suma, cuenta = suma[mes - 1:mes], cuenta[mes - 1:mes]
+        otro = None if eje is None else 1 - eje
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return suma.sum(axis=otro) / cuenta.sum(axis=otro)
+
+    def media(self, metrica, hotel=TODOS, año=TODOS, mes=None):
+        return float(self._media(metrica, hotel, año, None, mes))
+
+    def media_por_mes(self, metrica, hotel=TODOS, año=TODOS):
+        return pd.Series(self._media(metrica, hotel, año, 0), index=pd.Index(MESES, name="mes"), name=metrica)
+
+    def media_por_dia(self, metrica, hotel=TODOS, año=TODOS, mes=None):
+        return pd.Series(self._media(metrica, hotel, año, 1, mes), index=pd.Index(DIAS_SEMANA, name="dia_semana"),
+                         name=metrica)
+
+    #Medias de varias métricas para todas las combinaciones de hoteles y años, en una sola pasada por el cubo:
+    #devuelve las medias de cada (hotel, año) y las de cada (hotel, año, mes)
+    def comparar(self, metricas, hoteles, años):
+        filas = np.ix_([self.indice_hotel[h] for h in hoteles], [self.indice_año[a] for a in años])
+        columnas = [self.indice_metrica[m] for m in metricas]
+        suma = self.suma[filas][..., columnas].sum(axis=3)  # [hotel, año, mes, métrica]
+        cuenta = self.cuenta[filas][..., columnas].sum(axis=3)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mensual = suma / cuenta
+            total = suma.sum(axis=2) / cuenta.sum(axis=2)
+
+        indice = pd.MultiIndex.from_product([hoteles, años], names=["hotel_nombre", "anno"])
+        medias = pd.DataFrame(total.reshape(-1, len(metricas)), index=indice, columns=metricas)
+        indice = pd.MultiIndex.from_product([hoteles, años, MESES], names=["hotel_nombre", "anno", "mes"])
+        por_mes = pd.DataFrame(mensual.reshape(-1, len(metricas)), index=indice, columns=metricas)
+        return medias, por_mes
+
+    def extremos(self, metrica, hotel=TODOS, año=TODOS):
+        return (float(np.fmin.reduce(self.celdas(self.minimo, metrica, hotel, año), axis=None)),
+                float(np.fmax.reduce(self.celdas(self.maximo, metrica, hotel, año), axis=None)))
+
+
+#Agregados de todas las celdas (hotel, año, mes, día de la semana) a partir del cubo hotel × día
+def construir_cubo_olap(cubo_hoteles):
+    valores = np.asarray(cubo_hoteles.valores, dtype=float)  # [hotel, día, métrica]
+    fechas = cubo_hoteles.fechas
+    años = sorted(set(fechas.year))
+    n_hoteles, n_años, n_metricas = len(cubo_hoteles.hoteles), len(años), len(cubo_hoteles.metricas)
+
+    # Celda de cada día y días ordenados por celda: cada celda es un tramo contiguo para reduceat
+    celda = ((fechas.year.to_numpy() - años[0]) * 12 + fechas.month.to_numpy() - 1) * 7 + fechas.dayofweek.to_numpy()
+    orden = np.argsort(celda, kind="stable")
+    celdas_presentes, inicios = np.unique(celda[orden], return_index=True)
+    ordenados = valores[:, orden]
+    validos = ~np.isnan(ordenados)
+
+    forma = (n_hoteles + 1, n_años + 1, 12, 7, n_metricas)
+    suma, cuenta = np.zeros(forma), np.zeros(forma)
+    minimo, maximo = np.full(forma, np.nan), np.full(forma, np.nan)
+
+    por_celda = (n_hoteles, n_años * 12 * 7, n_metricas)
+    bloques = {
+        "suma": np.zeros(por_celda), "cuenta": np.zeros(por_celda),
+        "minimo": np.full(por_celda, np.nan), "maximo": np.full(por_celda, np.nan),
+    }
+    bloques["suma"][:, celdas_presentes] = np.add.reduceat(np.where(validos, ordenados, 0), inicios, axis=1)
+    bloques["cuenta"][:, celdas_presentes] = np.add.reduceat(validos, inicios, axis=1)
+    bloques["minimo"][:, celdas_presentes] = np.fmin.reduceat(ordenados, inicios, axis=1)
+    bloques["maximo"][:, celdas_presentes] = np.fmax.reduceat(ordenados, inicios, axis=1)
+    for nombre, bloque in bloques.items():
+        bloques[nombre] = bloque.reshape(n_hoteles, n_años, 12, 7, n_metricas)
+
+    # Detalle y totales: la última posición de los ejes de hotel y año es "Todos"
+    # (fmin/fmax ignoran los huecos)
+    for destino, bloque, reducir in ((suma, bloques["suma"], np.add.reduce), (cuenta, bloques["cuenta"], np.add.reduce),
+                                     (minimo, bloques["minimo"], np.fmin.reduce), (maximo, bloques["maximo"], np.fmax.reduce)):
+        por_hotel = reducir(bloque, axis=1)
+        destino[:n_hoteles, :n_años] = bloque
+        destino[:n_hoteles, n_años] = por_hotel
+        destino[n_hoteles, :n_años] = reducir(bloque, axis=0)
+        destino[n_hoteles, n_años] = reducir(por_hotel, axis=0)
+
+    return CuboOLAP(cubo_hoteles.hoteles, años, cubo_hoteles.metricas, suma, cuenta, minimo, maximo)
+
+
+#Un único cubo OLAP por proceso y versión de los datos, compartido por todas las sesiones
+@st.cache_resource
+def cargar_cubo_olap(version=None):
+    return construir_cubo_olap(cubo())
+
+
+def cubo_olap():
+    return cargar_cubo_olap(version_tabla(TABLA_ORIGEN))
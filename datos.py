@@ -0,0 +1,110 @@
+import os
+import unicodedata
+import pandas as pd
+import streamlit as st
+
+# Capa de acceso a los datos de baseDatos/
+# Cada CSV se convierte una sola vez a Parquet (columnar y tipado): fechas ya parseadas y nombres
+# de hoteles/servicios como categorías. Las páginas cargan las tablas desde aquí a través de una
+# caché de proceso, de forma que un rerun de Streamlit nunca vuelve a parsear un CSV.
+
+DIR_BASE = os.path.dirname(os.path.abspath(__file__))
+DIR_DATOS = os.path.join(DIR_BASE, "baseDatos")
+DIR_CACHE = os.path.join(DIR_DATOS, "cache")
+
+# Esquema de cada tabla: columnas de fecha y columnas categóricas
+TABLAS = {
+    "datos_sostenibilidad": {"fechas": ["fecha"], "categorias": ["hotel_nombre"]},
+    "ocupacion_hotelera": {"fechas": ["fecha"], "categorias": ["hotel_nombre"]},
+    "sostenibilidad_ocupacion": {"fechas": ["fecha"], "categorias": ["hotel_nombre"]},
+    "opiniones_turisticas": {"fechas": ["fecha"], "categorias": ["tipo_servicio", "nombre_servicio"]},
+    "rutas_turisticas": {"fechas": [], "categorias": ["tipo_ruta"]},
+    "uso_transporte": {"fechas": ["fecha"], "categorias": ["tipo_transporte", "ruta_popular"]},
+}
+
+
+def ruta_csv(nombre):
+    return os.path.join(DIR_DATOS, f"{nombre}.csv")
+
+
+def ruta_parquet(nombre):
+    return os.path.join(DIR_CACHE, f"{nombre}.parquet")
+
+
+#Normalizamos el texto según la base de datos (sin tildes y en minúsculas)
+def normalizar_texto(texto):
+    return ''.join(
+        c for c in unicodedata.normalize('NFD', texto)
+        if unicodedata.category(c) != 'Mn'
+    ).lower()
+
+
+#Leemos el CSV original y aplicamos los tipos definidos en el esquema
+def _leer_csv(nombre):
+    if nombre.startswith("predicciones_hoteles_"):
+        # Las predicciones tienen una columna por hotel y las fechas como índice
+        df = pd.read_csv(ruta_csv(nombre), index_col=0)
+        df.index = pd.to_datetime(df.index)
+        df.index.name = "fecha"
+        return df
+
+    esquema = TABLAS[nombre]
+    df = pd.read_csv(ruta_csv(nombre))
+    for columna in esquema["fechas"]:
+        # Se quitan los espacios alrededor de la fecha (p. ej. "    2024-03-04" en opiniones_turisticas) y solo se
+        # descartan las fechas mal formadas (p. ej. "2019-01-01d" en datos_sostenibilidad)
+        df[columna] = pd.to_datetime(df[columna].astype("string").str.strip(), format="%Y-%m-%d", errors="coerce")
+        df = df.dropna(subset=[columna])
+    for columna in esquema["categorias"]:
+        df[columna] = df[columna].astype("category")
+    return df.reset_index(drop=True)
+
+
+#Convertimos un CSV a Parquet si no existe la versión tipada o si el CSV es más reciente
+def convertir_tabla(nombre, forzar=False):
+    origen = ruta_csv(nombre)
+    destino = ruta_parquet(nombre)
+    if not forzar and os.path.exists(destino) and os.path.getmtime(destino) >= os.path.getmtime(origen):
+        return destino
+
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    df = _leer_csv(nombre)
+    # Escritura atómica: otra sesión nunca ve un fichero a medio escribir
+    temporal = f"{destino}.{os.getpid()}.tmp"
+    df.to_parquet(temporal)
+    os.replace(temporal, destino)
+    return destino
+
+
+#Versión de los datos de una tabla (cambia cada vez que se modifica su CSV)
+def version_tabla(nombre):
+    return int(os.path.getmtime(ruta_csv(nombre)) * 1e9)
+
+
+#Lectura sin caché de Streamlit (para scripts de entrenamiento y predicción)
+def leer_tabla(nombre):
+    return pd.read_parquet(convertir_tabla(nombre))
+
+
+def leer_predicciones(año=2025):
+    return leer_tabla(f"predicciones_hoteles_{año}")
+
+
+#Lectura con caché de proceso compartida entre sesiones (para las páginas de Streamlit)
+@st.cache_data
+def cargar_tabla(nombre, version=None):
+    return leer_tabla(nombre)
+
+
+def cargar(nombre):
+    return cargar_tabla(nombre, version_tabla(nombre))
+
+
+def cargar_predicciones(año=2025):
+    return cargar(f"predicciones_hoteles_{año}")
+
+
+if __name__ == "__main__":
+    # Conversión de todas las tablas: python datos.py
+    for nombre in list(TABLAS) + ["predicciones_hoteles_2025"]:
+        print(f"{nombre}: {convertir_tabla(nombre, forzar=True)}")
@@ -0,0 +1,146 @@
+import os
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import streamlit as st
+from datos import DIR_CACHE, leer_tabla, version_tabla
+
+# Demanda histórica de transporte entre ciudades
+# uso_transporte se agrega una sola vez en matrices dispersas con una fila por par origen - destino y una columna por
+# (transporte, mes, día de la semana): número de registros, suma de usuarios y suma de tiempos de viaje. Las sumas
+# se hacen con np.unique + np.bincount sobre la clave de cada celda y se guardan en disco junto a la versión de los
+# datos. Cualquier corte (mapa origen × destino de un mes, un día de la semana o un transporte, o el reparto por
+# transporte de un trayecto) es un producto matriz-vector o una fila de la matriz, sin volver a leer el CSV.
+
+TABLA = "uso_transporte"
+RUTA_DEMANDA = os.path.join(DIR_CACHE, "demanda_transporte.npz")
+MESES = 12
+DIAS_SEMANA = 7
+NOMBRES_MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto", "septiembre", "octubre",
+                 "noviembre", "diciembre"]
+NOMBRES_DIAS = ["lunes", "martes", "miércoles", "jueves", "viernes", "sábados", "domingos"]
+MEDIDAS = ["viajes", "usuarios", "usuarios_medios", "tiempo_medio"]
+
+
+class DemandaTransporte:
+    def __init__(self, ciudades, transportes, claves, viajes, usuarios, tiempo):
+        self.ciudades = [str(c) for c in ciudades]
+        self.transportes = [str(t) for t in transportes]
+        self.indice_ciudad = {ciudad: i for i, ciudad in enumerate(self.ciudades)}
+        self.indice_transporte = {transporte: i for i, transporte in enumerate(self.transportes)}
+        # Celdas con registros: clave de la celda y sus agregados (lo que se guarda en disco)
+        self.celdas = {
+            "claves": np.asarray(claves, dtype=np.int64),
+            "viajes": np.asarray(viajes, dtype=np.int64),
+            "usuarios": np.asarray(usuarios, dtype=float),
+            "tiempo": np.asarray(tiempo, dtype=float),
+        }
+        columnas = len(self.transportes) * MESES * DIAS_SEMANA
+        filas, cols = np.divmod(self.celdas["claves"], columnas)
+        # Matrices [origen * ciudades + destino, (transporte * 12 + mes - 1) * 7 + día de la semana]
+        self.matrices = [sp.csr_matrix((self.celdas[nombre].astype(float), (filas, cols)),
+                                       shape=(len(self.ciudades) ** 2, columnas))
+                         for nombre in ("viajes", "usuarios", "tiempo")]
+
+    #Agregación del histórico: una celda por (origen, destino, transporte, mes, día de la semana)
+    @classmethod
+    def desde_uso(cls, uso):
+        # Se separan solo los trayectos distintos, no cada fila
+        ruta, rutas = pd.factorize(uso["ruta_popular"].astype(str))
+        pares = pd.Series(rutas).str.split(" - ", n=1, expand=True)
+        ciudades, codigos = np.unique(np.concatenate([pares[0].to_numpy(), pares[1].to_numpy()]), return_inverse=True)
+        origen, destino = (c[ruta] for c in np.split(codigos, 2))
+        transporte, transportes = pd.factorize(uso["tipo_transporte"].astype(str), sort=True)
+        fecha = pd.DatetimeIndex(uso["fecha"])
+
+        columnas = len(transportes) * MESES * DIAS_SEMANA
+        clave = ((origen * len(ciudades) + destino) * columnas +
+                 (transporte * MESES + fecha.month.to_numpy() - 1) * DIAS_SEMANA + fecha.dayofweek.to_numpy())
+        claves, celda = np.unique(clave, return_inverse=True)
+        return cls(ciudades, transportes, claves,
+                   np.bincount(celda, minlength=len(claves)),
+                   np.bincount(celda, weights=uso["num_usuarios"].to_numpy(dtype=float), minlength=len(claves)),
+                   np.bincount(celda, weights=uso["tiempo_viaje_promedio_min"].to_numpy(dtype=float),
+                               minlength=len(claves)))
+
+    #Ejes (transporte, mes, día de la semana) de un corte: None = todos los valores de esa dimensión
+    @staticmethod
+    def _corte(mes=None, dia_semana=None):
+        return (slice(None) if mes is None else slice(mes - 1, mes),
+                slice(None) if dia_semana is None else slice(dia_semana, dia_semana + 1))
+
+    @staticmethod
+    def _medidas(viajes, usuarios, tiempo):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "viajes": viajes.astype(np.int64),
+                "usuarios": usuarios,
+                "usuarios_medios": np.where(viajes > 0, usuarios / viajes, np.nan),
+                "tiempo_medio": np.where(viajes > 0, tiempo / viajes, np.nan),
+            }
+
+    #Mapa origen × destino de una medida para un corte (NaN en las medias de los pares sin registros)
+    def mapa(self, medida="usuarios", mes=None, dia_semana=None, transporte=None):
+        seleccion = np.zeros((len(self.transportes), MESES, DIAS_SEMANA))
+        if transporte is None or transporte in self.indice_transporte:
+            t = slice(None) if transporte is None else self.indice_transporte[transporte]
+            seleccion[(t,) + self._corte(mes, dia_semana)] = 1
+        n = len(self.ciudades)
+        sumas = (matriz @ seleccion.ravel() for matriz in self.matrices)
+        valores = self._medidas(*sumas)[medida].reshape(n, n)
+        return pd.DataFrame(valores, index=pd.Index(self.ciudades, name="origen"),
+                            columns=pd.Index(self.ciudades, name="destino"))
+
+    #Demanda de un trayecto por tipo de transporte en un corte (solo los transportes con registros)
+    def por_transporte(self, origen, destino, mes=None, dia_semana=None):
+        i, j = self.indice_ciudad.get(origen), self.indice_ciudad.get(destino)
+        if i is None or j is None:
+            return pd.DataFrame(columns=MEDIDAS, index=pd.Index([], name="tipo_transporte"))
+        fila = i * len(self.ciudades) + j
+        corte = (slice(None),) + self._corte(mes, dia_semana)
+        sumas = (matriz[fila].toarray().reshape(len(self.transportes), MESES, DIAS_SEMANA)[corte].sum(axis=(1, 2))
+                 for matriz in self.matrices)
+        tabla = pd.DataFrame(self._medidas(*sumas), index=pd.Index(self.transportes, name="tipo_transporte"))
+        return tabla[tabla["viajes"] > 0]
+
+
+def construir_demanda(uso=None):
+    return DemandaTransporte.desde_uso(leer_tabla(TABLA) if uso is None else uso)
+
+
+def guardar(demanda, version, ruta=RUTA_DEMANDA):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp.npz"
+    np.savez(temporal, version=version, ciudades=np.array(demanda.ciudades),
+             transportes=np.array(demanda.transportes), **demanda.celdas)
+    os.replace(temporal, ruta)
+
+
+#Matrices guardadas en disco si son de la versión actual de los datos; si no, se recalculan y se guardan
+def demanda_guardada(forzar=False):
+    version = version_tabla(TABLA)
+    if not forzar and os.path.exists(RUTA_DEMANDA):
+        with np.load(RUTA_DEMANDA, allow_pickle=False) as datos:
+            datos = dict(datos)
+        if int(datos.pop("version")) == version:
+            return DemandaTransporte(**datos)
+    demanda = construir_demanda()
+    guardar(demanda, version)
+    return demanda
+
+
+#Unas únicas matrices por proceso y versión de los datos, compartidas por todas las sesiones
+@st.cache_resource
+def cargar_demanda(version=None):
+    return demanda_guardada()
+
+
+def demanda_transporte():
+    return cargar_demanda(version_tabla(TABLA))
+
+
+if __name__ == "__main__":
+    # Agregación de la demanda: python demanda_transporte.py
+    demanda = demanda_guardada(forzar=True)
+    print(f"{len(demanda.ciudades)} ciudades, {len(demanda.transportes)} transportes, "
+          f"{len(demanda.celdas['claves'])} celdas: {RUTA_DEMANDA}")
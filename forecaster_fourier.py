@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+# Predictor de series diarias con regresión lineal sobre términos de Fourier
+# Las estacionalidades que usa series.py con Prophet (semanal, anual y una mensual de 30.5 días) se expresan como
+# senos y cosenos del tiempo; junto con una tendencia lineal forman una única matriz de diseño sobre el eje de
+# fechas, compartida por todos los hoteles, que se resuelve con un solo mínimos cuadrados para todos a la vez.
+
+# (periodo en días, orden de Fourier): los mismos que Prophet usa por defecto y la mensual añadida en series.py
+ESTACIONALIDADES = {
+    "semanal": (7, 3),
+    "anual": (365.25, 10),
+    "mensual": (30.5, 5),
+}
+
+
+class ForecasterFourier:
+    def __init__(self, estacionalidades=ESTACIONALIDADES):
+        self.estacionalidades = estacionalidades
+        self.inicio = None
+        self.escala = None
+        self.coeficientes = None  # [columna de la matriz de diseño, serie]
+        self.series = None
+
+    #Matriz de diseño: constante, tendencia lineal y un seno y un coseno por orden de cada estacionalidad
+    def matriz_diseño(self, fechas):
+        fechas = pd.DatetimeIndex(fechas)
+        # Días desde 1970 (igual que Prophet) para la fase de los términos de Fourier
+        dias = (fechas - pd.Timestamp("1970-01-01")).days.to_numpy(dtype=float)
+        tendencia = (fechas - self.inicio).days.to_numpy(dtype=float) / self.escala
+
+        columnas = [np.ones_like(dias), tendencia]
+        for periodo, orden in self.estacionalidades.values():
+            angulo = 2 * np.pi * np.outer(dias, np.arange(1, orden + 1)) / periodo
+            columnas.extend([np.sin(angulo), np.cos(angulo)])
+        return np.column_stack(columnas)
+
+    #Ajuste de todas las series a la vez; Y es un DataFrame con las fechas como índice y una columna por serie
+    def ajustar(self, Y):
+        fechas = pd.DatetimeIndex(Y.index)
+        self.inicio = fechas.min()
+        self.escala = max((fechas.max() - self.inicio).days, 1)
+        self.series = list(Y.columns)
+
+        A = self.matriz_diseño(fechas)
+        valores = Y.to_numpy(dtype=float)
+        completas = ~np.isnan(valores).any(axis=0)
+
+        self.coeficientes = np.empty((A.shape[1], valores.shape[1]))
+        # Las series completas comparten un único lstsq con varios lados derechos
+        if completas.any():
+            self.coeficientes[:, completas] = np.linalg.lstsq(A, valores[:, completas], rcond=None)[0]
+        # Las que tengan huecos se resuelven aparte con sus filas válidas
+        for j in np.flatnonzero(~completas):
+            validas = ~np.isnan(valores[:, j])
+            self.coeficientes[:, j] = np.linalg.lstsq(A[validas], valores[validas, j], rcond=None)[0]
+        return self
+
+    def predecir(self, fechas):
+        fechas = pd.DatetimeIndex(fechas)
+        return pd.DataFrame(self.matriz_diseño(fechas) @ self.coeficientes, index=fechas, columns=self.series)
@@ -0,0 +1,119 @@
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import dijkstra
+import streamlit as st
+from datos import leer_tabla, version_tabla
+from registro_modelos import PREFERENCIAS
+from tabla_transporte import SOSTENIBILIDAD_TRANSPORTE
+
+# Red de transporte entre ciudades
+# Cada par origen - destino de uso_transporte es una arista por tipo de transporte, con su tiempo medio, sus usuarios
+# medios y su nivel de sostenibilidad. Para cada objetivo (eco / eficiencia / popularidad) la arista usa el
+# transporte con mejor score (mismos pesos y normalización que el entrenamiento del predictor) y cuesta 1 - score,
+# así que un itinerario con escalas es el camino más corto en ese grafo. Los caminos mínimos entre todos los pares
+# se calculan al construir la red si es pequeña; si no, se lanza Dijkstra desde cada origen la primera vez que se
+# pide y se memoriza. No hay coordenadas de las ciudades, así que no hay heurística para A*: sería Dijkstra.
+
+TABLA = "uso_transporte"
+# Hasta este número de ciudades se calculan todos los pares al construir la red
+MAX_CIUDADES_TODOS_PARES = 500
+
+
+#Aristas (origen, destino, transporte) con los valores medios del histórico
+def aristas_transporte(uso):
+    ciudades = uso["ruta_popular"].astype(str).str.split(" - ", n=1, expand=True)
+    aristas = uso.assign(origen=ciudades[0], destino=ciudades[1], tipo_transporte=uso["tipo_transporte"].astype(str))
+    aristas = aristas.groupby(["origen", "destino", "tipo_transporte"], sort=True).agg(
+        tiempo=("tiempo_viaje_promedio_min", "mean"), usuarios=("num_usuarios", "mean")).reset_index()
+    aristas["eco"] = aristas["tipo_transporte"].map(SOSTENIBILIDAD_TRANSPORTE).fillna(3).astype(int)
+    # Normalización del entrenamiento: máximos del histórico y sostenibilidad sobre 5
+    aristas["usuarios_norm"] = aristas["usuarios"] / uso["num_usuarios"].max()
+    aristas["tiempo_norm"] = aristas["tiempo"] / uso["tiempo_viaje_promedio_min"].max()
+    aristas["eco_norm"] = aristas["eco"] / 5
+    return aristas
+
+
+class GrafoTransporte:
+    def __init__(self, aristas):
+        self.aristas = aristas.reset_index(drop=True)
+        self.ciudades = sorted(set(self.aristas["origen"]) | set(self.aristas["destino"]))
+        self.indice = {ciudad: i for i, ciudad in enumerate(self.ciudades)}
+        n = len(self.ciudades)
+        origen = self.aristas["origen"].map(self.indice).to_numpy()
+        destino = self.aristas["destino"].map(self.indice).to_numpy()
+
+        self.mejor = {}  # objetivo -> matriz dispersa [origen, destino] con la arista elegida + 1 (0 si no hay)
+        self.grafos = {}  # objetivo -> matriz dispersa de costes
+        self._caminos = {}  # (objetivo, origen) -> (distancias, predecesores)
+        for objetivo, (alfa, beta, gamma) in PREFERENCIAS.items():
+            score = (alfa * self.aristas["usuarios_norm"] + beta * (1 - self.aristas["tiempo_norm"]) +
+                     gamma * self.aristas["eco_norm"]).to_numpy()
+            # Mejor transporte de cada par: máximo score (a igualdad, el primero por orden alfabético)
+            orden = np.lexsort((np.arange(len(score)), -score, destino, origen))
+            primeras = orden[np.r_[True, (np.diff(origen[orden]) != 0) | (np.diff(destino[orden]) != 0)]]
+            self.mejor[objetivo] = sp.csr_matrix((primeras + 1, (origen[primeras], destino[primeras])), shape=(n, n))
+            # Coste 1 - score (> 0: el tiempo nunca es 0, así que el score nunca llega a 1)
+            self.grafos[objetivo] = sp.csr_matrix((1 - score[primeras], (origen[primeras], destino[primeras])),
+                                                  shape=(n, n))
+
+        if n <= MAX_CIUDADES_TODOS_PARES:
+            for objetivo, grafo in self.grafos.items():
+                distancias, predecesores = dijkstra(grafo, directed=True, return_predecessors=True)
+                for i in range(n):
+                    self._caminos[(objetivo, i)] = (distancias[i], predecesores[i])
+
+    #Caminos mínimos desde un origen (precalculados o con Dijkstra la primera vez)
+    def _desde(self, objetivo, origen):
+        clave = (objetivo, origen)
+        if clave not in self._caminos:
+            distancias, predecesores = dijkstra(self.grafos[objetivo], directed=True, indices=origen,
+                                                return_predecessors=True)
+            self._caminos[clave] = (distancias, predecesores)
+        return self._caminos[clave]
+
+    #Itinerario de menor coste entre dos ciudades para un objetivo: DataFrame con un tramo por fila (origen,
+    #destino, transporte, tiempo, usuarios, eco), o None si no hay camino
+    def itinerario(self, origen, destino, objetivo):
+        objetivo = objetivo.lower()
+        i, j = self.indice.get(origen), self.indice.get(destino)
+        if i is None or j is None or i == j:
+            return None
+        distancias, predecesores = self._desde(objetivo, i)
+        if np.isinf(distancias[j]):
+            return None
+        paradas = [j]
+        while paradas[-1] != i:
+            paradas.append(predecesores[paradas[-1]])
+        paradas.reverse()
+        tramos = [int(self.mejor[objetivo][a, b]) - 1 for a, b in zip(paradas, paradas[1:])]
+        return self.aristas.loc[tramos, ["origen", "destino", "tipo_transporte", "tiempo", "usuarios", "eco"]] \
+            .reset_index(drop=True)
+
+    def conectadas(self, origen, destino):
+        i, j = self.indice.get(origen), self.indice.get(destino)
+        return i is not None and j is not None and (self.mejor["eco"][i, j] > 0)
+
+
+def construir_grafo(uso=None):
+    return GrafoTransporte(aristas_transporte(leer_tabla(TABLA) if uso is None else uso))
+
+
+#Una única red por proceso y versión de los datos, compartida por todas las sesiones
+@st.cache_resource
+def cargar_grafo(version=None):
+    return construir_grafo()
+
+
+def grafo_transporte():
+    return cargar_grafo(version_tabla(TABLA))
+
+
+#Resumen de un itinerario con escalas en el formato de las predicciones de la página
+def resumen_itinerario(tramos):
+    return {
+        'transporte_recomendado': " → ".join(tramos["tipo_transporte"]),
+        'tiempo_estimado_min': int(round(tramos["tiempo"].sum())),
+        'usuarios_estimados': int(tramos["usuarios"].min()),
+        'sostenibilidad_nivel': int(tramos["eco"].min()),
+        'escalas': list(tramos["destino"].iloc[:-1]),
+    }
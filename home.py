@@ -1,5 +1,8 @@
 import streamlit as st
+from registro_modelos import precalentar_al_arrancar
 
+# Carga anticipada y en segundo plano de los modelos de transporte (si PRECALENTAR_MODELOS=1)
+precalentar_al_arrancar()
 
  # --- CSS personalizado para los botones ---
 st.markdown("""
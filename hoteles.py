@@ -4,7 +4,41 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import matplotlib.dates as mdates
 import matplotlib.ticker as ticker
+from datos import cargar, cargar_predicciones, version_tabla
+from cubo_metricas import cubo
+from precios_hoteles import estimar_precios, tabla_precios
+from cache_graficos import clave_grafico, mostrar_grafico
+from buscador_opiniones import mostrar_buscador
+from almacen_opiniones import ORDENES, almacen_opiniones
+from resumen_servicios import consultar, tabla_resumen
+from resumen_comentarios import mostrar_resumen_comentarios
+
+
+#Gráfico de la tasa de ocupación prevista para las fechas elegidas
+def fig_ocupacion_prevista(pred_range):
+    sns.set_theme(style="whitegrid")
+    fig, ax = plt.subplots(figsize=(10, 5))
+
+    sns.lineplot(
+        x=pred_range.index,
+        y=pred_range.values,
+        marker="o",
+        linewidth=2,
+        markersize=7,
+        color="#388e3c",
+        ax=ax
+    )
 
+    ax.set_xlabel("Fecha", fontsize=13)
+    ax.set_ylabel("Tasa de Ocupación (%)", fontsize=13)
+    ax.set_xticks(pred_range.index)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%d %b'))
+    fig.autofmt_xdate(rotation=45)
+    ax.yaxis.set_major_locator(ticker.MaxNLocator(integer=True))
+    ax.grid(True, which='major', linestyle='--', linewidth=0.5, alpha=0.7)
+    sns.despine(top=True, right=True)
+    plt.tight_layout()
+    return fig
 
 
 def app(change_page_func):
@@ -12,18 +46,7 @@ def app(change_page_func):
 
     #----- Cargar datos ------
 
-    opiniones = pd.read_csv('baseDatos/opiniones_turisticas.csv')
-    opiniones = opiniones[opiniones['tipo_servicio'] == 'Hotel']
-    df = pd.read_csv("baseDatos/ocupacion_hotelera.csv", parse_dates=["fecha"])
-
-    # Excluir el año 2020 por ser atípico en los datos de ocupación
-    df = df[df["fecha"].dt.year != 2020]    
-
-    # Crear datos adicionales
-    num_opiniones = opiniones['nombre_servicio'].value_counts().to_dict()
-    opiniones_hoteles = opiniones.groupby(['nombre_servicio']).agg({'puntuacion': 'mean'}).reset_index()
-    opiniones_hoteles['num_opiniones'] = opiniones_hoteles['nombre_servicio'].map(num_opiniones)
-    opiniones_hoteles['puntuacion'] = opiniones_hoteles['puntuacion'].round(2)
+    cubo_hoteles = cubo()
 
     # ----- Título y descripción -----
     st.title("Explora y valora los hoteles de GreenLake Village 🌍🛎️")
@@ -59,12 +82,8 @@ def app(change_page_func):
     # Aplicar orden seleccionado
     orden = st.session_state.orden_hoteles
 
-    if orden == "Puntuación (de mayor a menor)":
-        opiniones_hoteles = opiniones_hoteles.sort_values(by="puntuacion", ascending=False)
-    elif orden == "Puntuación (de menor a mayor)":
-        opiniones_hoteles = opiniones_hoteles.sort_values(by="puntuacion", ascending=True)
-    elif orden == "Número de opiniones":
-        opiniones_hoteles = opiniones_hoteles.sort_values(by="num_opiniones", ascending=False)
+    # Resumen de las opiniones de los hoteles (materializado, ver resumen_servicios.py)
+    opiniones_hoteles = consultar(tabla_resumen(), tipos=['Hotel'], orden=orden, decimales=2)
 
     # Mostrar orden actual (opcional)
     st.markdown(f"<p style='text-align:center; color:gray;'>Orden actual: <strong>{orden}</strong></p>", unsafe_allow_html=True)
@@ -86,20 +105,28 @@ def app(change_page_func):
 
     # ----- Selección de hotel -----
     st.markdown("<div style='height:5px'></div>", unsafe_allow_html=True) #Espacio entre botones
-    hoteles = sorted(df["hotel_nombre"].unique())
+    hoteles = cubo_hoteles.hoteles
     st.markdown("#### Opiniones de los húespedes 🗣️")
     selected_hotel = st.selectbox("_Seleccione un hotel_:", hoteles)
+    # Palabras clave y tono de sus comentarios (calculados por lotes, ver resumen_comentarios.py)
+    mostrar_resumen_comentarios(selected_hotel)
 
     # ----- Mostrar opiniones del hotel seleccionado -----
-    opiniones_filtradas = opiniones[opiniones["nombre_servicio"] == selected_hotel]
-
-    opiniones_por_pagina = 3
-    total_opiniones = len(opiniones_filtradas)
-    total_paginas = (total_opiniones // opiniones_por_pagina) + (1 if total_opiniones % opiniones_por_pagina > 0 else 0)
+    # Tramo del servicio en el almacén de opiniones (ordenado por servicio, ver almacen_opiniones.py)
+    almacen = almacen_opiniones()
+    col1, col2 = st.columns(2)
+    with col1:
+        orden_opiniones = ORDENES[st.selectbox("_Orden de las opiniones_", list(ORDENES))]
+    with col2:
+        opiniones_por_pagina = st.selectbox("_Opiniones por página_", [3, 5, 10])
+    total_opiniones = almacen.total(selected_hotel)
+    total_paginas = almacen.total_paginas(selected_hotel, opiniones_por_pagina)
 
     # Inicializar sesión de Streamlit para la página actual
     if "pagina_actual" not in st.session_state:
         st.session_state.pagina_actual = 1
+    # Al cambiar el tamaño de página (o de servicio) la página actual puede quedar fuera del nuevo total
+    st.session_state.pagina_actual = max(1, min(st.session_state.pagina_actual, total_paginas))
 
 
     
@@ -114,21 +141,10 @@ def app(change_page_func):
         if st.button("Siguiente ➡️") and st.session_state.pagina_actual < total_paginas:
             st.session_state.pagina_actual += 1
 
-    # Calcular índices de inicio y fin para mostrar comentarios
-    indice_inicio = (st.session_state.pagina_actual - 1) * opiniones_por_pagina
-    indice_fin = indice_inicio + opiniones_por_pagina
-
     # Mostrar opiniones paginadas
 
-    for _, row in opiniones_filtradas.iloc[indice_inicio:indice_fin].iterrows():
-        opinion = row["comentario"]
-        puntuacion = row["puntuacion"]
-
-        st.markdown(f"""
-        <div style="background-color:#e3f2fd; padding:15px; border-radius:10px; border:1px solid #90caf9; margin-bottom:10px;">
-            <p style="margin:0;"><strong>{puntuacion}⭐</strong> <span style="margin-left:8px;">🗣️</span> {opinion}</p>
-        </div>
-        """, unsafe_allow_html=True)
+    for html_opinion in almacen.pagina(selected_hotel, st.session_state.pagina_actual, opiniones_por_pagina, orden_opiniones):
+        st.markdown(html_opinion, unsafe_allow_html=True)
 
     # Desactivar botón si ya estamos en la primera o última página
     if total_opiniones == 0:
@@ -174,40 +190,13 @@ def app(change_page_func):
         st.markdown(f"<p style='text-align:center; color:gray;'>Modo seleccionado: <strong>{opcion}</strong></p>", unsafe_allow_html=True)
 
 
-        # Filtrar datos para el hotel seleccionado
-        df_hotel = df[df["hotel_nombre"] == selected_hotel].copy()
+        # Precio medio de cada noche del rango (una sola consulta sobre la tabla precalculada)
+        precios_noche, total_sum = estimar_precios(tabla_precios(), selected_hotel, start_date, end_date, opcion)
 
-        # Crear una columna con (mes, día) para comparar con el rango elegido
-        df_hotel["mes_dia"] = df_hotel["fecha"].apply(lambda x: (x.month, x.day))
-        
-    # Generar la lista de días del rango seleccionado
-        dias = pd.date_range(start_date, end_date)
-        
-        daily_means = {}
-        total_sum = 0.0
-        
-        for day in dias:
-            md = (day.month, day.day)
-            df_day = df_hotel[df_hotel["mes_dia"] == md]
-            
-            if df_day.empty:
-                mean_day = None
-            else:
-                if opcion == "Último año":
-                    # Seleccionar el año más reciente para ese día
-                    max_year = df_day["fecha"].dt.year.max()
-                    df_day = df_day[df_day["fecha"].dt.year == max_year]
-                else:  # Últimos 5 años
-                    available_years = sorted(df_day["fecha"].dt.year.unique(), reverse=True)
-                    selected_years = available_years[:5]
-                    df_day = df_day[df_day["fecha"].dt.year.isin(selected_years)]
-                mean_day = df_day["precio_promedio_noche"].mean()
-            
-            if mean_day is not None:
-                daily_means[day.strftime("%Y-%m-%d")] = mean_day
-                total_sum += mean_day
-            else:
-                daily_means[day.strftime("%Y-%m-%d")] = "No hay datos"
+        daily_means = {
+            day.strftime("%Y-%m-%d"): "No hay datos" if pd.isna(mean_day) else mean_day
+            for day, mean_day in precios_noche.items()
+        }
         
         st.markdown("### Precio promedio por noche")
 
@@ -263,8 +252,7 @@ def app(change_page_func):
         """, unsafe_allow_html=True)
 
         
-        pred_df = pd.read_csv("baseDatos/predicciones_hoteles_2025.csv", index_col=0, parse_dates=True)
-        pred_df.index = pd.to_datetime(pred_df.index)
+        pred_df = cargar_predicciones(2025)
 
         # Filtrar las predicciones para el rango de fechas seleccionado
         pred_range = pred_df.loc[start_date:end_date, selected_hotel]
@@ -274,32 +262,15 @@ def app(change_page_func):
         else:
             st.markdown("<div style='height:15px'></div>", unsafe_allow_html=True) #Espacio entre botones
             st.write("### Tasa de ocupación esperada para tus fechas")
-            sns.set_theme(style="whitegrid")
-            fig, ax = plt.subplots(figsize=(10, 5))
-
-            
-            sns.lineplot(
-                x=pred_range.index,
-                y=pred_range.values,
-                marker="o",
-                linewidth=2,
-                markersize=7,
-                color="#388e3c",
-                ax=ax
-            )
-            
-            ax.set_xlabel("Fecha", fontsize=13)
-            ax.set_ylabel("Tasa de Ocupación (%)", fontsize=13)
-            ax.set_xticks(pred_range.index)
-            ax.xaxis.set_major_formatter(mdates.DateFormatter('%d %b'))
-            fig.autofmt_xdate(rotation=45)
-            ax.yaxis.set_major_locator(ticker.MaxNLocator(integer=True))
-            ax.grid(True, which='major', linestyle='--', linewidth=0.5, alpha=0.7)
-            sns.despine(top=True, right=True)
-            plt.tight_layout()
-            st.pyplot(fig)
+            clave = clave_grafico("ocupacion_prevista", selected_hotel, 2025, None, "tasa_ocupacion",
+                                  version_tabla("predicciones_hoteles_2025"), desde=str(start_date), hasta=str(end_date))
+            mostrar_grafico(clave, lambda: fig_ocupacion_prevista(pred_range))
 
 
+    # Buscador por palabras clave en las opiniones (por defecto, solo las de hoteles)
+    st.markdown("<div style='height:5px'></div>", unsafe_allow_html=True)
+    mostrar_buscador(cargar("opiniones_turisticas"), ['Hotel'])
+
     #Botón para volver al inicio
     st.markdown("<div style='height:5px'></div>", unsafe_allow_html=True)
     if st.button("🏠 Volver al Inicio"):
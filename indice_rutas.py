@@ -0,0 +1,145 @@
+import copy
+import threading
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import leer_tabla, normalizar_texto, version_tabla
+from puntuacion_rutas import DIFICULTADES, POPULARIDADES, TABLA, UMBRAL_POPULAR, tramo_dificultad
+
+# Índice de bitmaps de las rutas turísticas
+# Un bitmap empaquetado (un bit por ruta, np.packbits) por cada tipo de ruta, clase de popularidad y tramo de
+# dificultad, y las duraciones ordenadas junto a la posición de cada ruta. Cualquier combinación de respuestas del
+# cuestionario se resuelve con AND de bitmaps y una búsqueda binaria para la ventana de duración, y el número de
+# rutas que la cumplen es un recuento de bits. Cuando el CSV gana filas al final solo se indexan las nuevas.
+
+
+#Bitmap empaquetado de `n` bits con los bits nuevos añadidos al final (solo se rehace el último byte)
+def extender_bitmap(bitmap, n, bits):
+    resto = n % 8
+    if resto == 0:
+        return np.concatenate([bitmap, np.packbits(bits)])
+    ultimo = np.unpackbits(bitmap[-1:])[:resto]
+    return np.concatenate([bitmap[:-1], np.packbits(np.concatenate([ultimo, bits]))])
+
+
+#Número de bits a 1 (los bits de relleno del último byte siempre son 0)
+def contar_bits(bitmap):
+    return int(np.unpackbits(bitmap).sum(dtype=np.int64))
+
+
+class IndiceRutas:
+    def __init__(self):
+        self.n = 0
+        self.version = None
+        self.tipos = {}  # tipo normalizado -> bitmap
+        self.popularidad = {clase: np.empty(0, dtype=np.uint8) for clase in POPULARIDADES}
+        self.dificultad = {tramo: np.empty(0, dtype=np.uint8) for tramo in DIFICULTADES}
+        self.duraciones = np.empty(0)  # ordenadas
+        self.posiciones = np.empty(0, dtype=np.int64)  # ruta de cada duración ordenada
+        self.huellas = np.empty(0, dtype=np.uint64)  # hash de cada fila indexada
+        self.todas = np.empty(0, dtype=np.uint8)
+
+    #Alta de rutas al final del índice: solo se calculan los bits y las duraciones de las rutas nuevas (los bitmaps
+    #existentes se copian tal cual salvo su último byte)
+    def anadir(self, rutas):
+        m = len(rutas)
+        if m == 0:
+            return self
+        # Se normalizan solo los tipos distintos, no cada fila
+        codigos, valores = pd.factorize(rutas["tipo_ruta"])
+        tipos = np.array([normalizar_texto(str(v)) for v in valores], dtype=object)[codigos]
+        popular = rutas["popularidad"].to_numpy(dtype=float) >= UMBRAL_POPULAR
+        tramo = tramo_dificultad(rutas["longitud_km"])
+
+        for tipo in pd.unique(tipos):
+            if tipo not in self.tipos:
+                self.tipos[tipo] = np.zeros(-(-self.n // 8), dtype=np.uint8)
+        for tipo, bitmap in self.tipos.items():
+            self.tipos[tipo] = extender_bitmap(bitmap, self.n, tipos == tipo)
+        for clase, bits in zip(POPULARIDADES, (popular, ~popular)):
+            self.popularidad[clase] = extender_bitmap(self.popularidad[clase], self.n, bits)
+        for i, nombre in enumerate(DIFICULTADES):
+            self.dificultad[nombre] = extender_bitmap(self.dificultad[nombre], self.n, tramo == i)
+        self.todas = extender_bitmap(self.todas, self.n, np.ones(m, dtype=bool))
+
+        # Mezcla de las duraciones nuevas (ordenadas) en el array ordenado
+        duraciones = rutas["duracion_hr"].to_numpy(dtype=float)
+        orden = np.argsort(duraciones, kind="stable")
+        huecos = np.searchsorted(self.duraciones, duraciones[orden], side="right")
+        self.duraciones = np.insert(self.duraciones, huecos, duraciones[orden])
+        self.posiciones = np.insert(self.posiciones, huecos, self.n + orden)
+
+        self.huellas = np.concatenate([self.huellas, pd.util.hash_pandas_object(rutas, index=False).to_numpy()])
+        self.n += m
+        return self
+
+    #Bitmap de las rutas con duración dentro de [mínimo, máximo]
+    def bitmap_duracion(self, minimo, maximo):
+        desde = np.searchsorted(self.duraciones, minimo, side="left")
+        hasta = np.searchsorted(self.duraciones, maximo, side="right")
+        bits = np.zeros(self.n, dtype=bool)
+        bits[self.posiciones[desde:hasta]] = True
+        return np.packbits(bits)
+
+    #Rutas que cumplen todas las respuestas dadas (None = pregunta sin responder), como bitmap
+    def consultar(self, tipo=None, popularidad=None, dificultad=None, duracion=None):
+        bitmap = self.todas
+        if tipo is not None:
+            bitmap = bitmap & self.tipos.get(normalizar_texto(tipo), np.zeros_like(self.todas))
+        if popularidad is not None:
+            bitmap = bitmap & self.popularidad[popularidad]
+        if dificultad is not None:
+            bitmap = bitmap & self.dificultad[dificultad]
+        if duracion is not None:
+            bitmap = bitmap & self.bitmap_duracion(*duracion)
+        return bitmap
+
+    def contar(self, **respuestas):
+        return contar_bits(self.consultar(**respuestas))
+
+    #Posiciones (en el orden del CSV) de las rutas que cumplen las respuestas
+    def posiciones_rutas(self, **respuestas):
+        return np.flatnonzero(np.unpackbits(self.consultar(**respuestas), count=self.n))
+
+    #Copia que comparte los arrays (anadir nunca los modifica, los sustituye)
+    def copia(self):
+        indice = copy.copy(self)
+        indice.tipos, indice.popularidad, indice.dificultad = dict(self.tipos), dict(self.popularidad), dict(self.dificultad)
+        return indice
+
+    #Índice al día con la tabla, sin tocar este (puede estar usándolo otra sesión): si las filas ya indexadas siguen
+    #igual al principio solo se indexan las nuevas; si no, se construye uno nuevo
+    def actualizar(self, rutas, version=None):
+        if len(rutas) >= self.n and np.array_equal(
+                pd.util.hash_pandas_object(rutas.iloc[:self.n], index=False).to_numpy(), self.huellas):
+            indice = self.copia()
+        else:
+            indice = IndiceRutas()
+        indice.anadir(rutas.iloc[indice.n:])
+        indice.version = version
+        return indice
+
+
+class RegistroIndice:
+    def __init__(self):
+        self.indice = IndiceRutas()
+        self._cerrojo = threading.Lock()
+
+    #Índice al día con la versión actual de rutas_turisticas
+    def obtener(self):
+        version = version_tabla(TABLA)
+        with self._cerrojo:
+            if self.indice.version != version:
+                self.indice = self.indice.actualizar(leer_tabla(TABLA), version)
+            return self.indice
+
+
+#Un único registro por proceso (compartido por todas las sesiones): el índice se actualiza en el sitio cuando
+#cambia la versión de los datos en lugar de construirse otro desde cero
+@st.cache_resource
+def registro_indice():
+    return RegistroIndice()
+
+
+def indice_rutas():
+    return registro_indice().obtener()
@@ -1,89 +1,183 @@
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-import joblib
-
-# Leemos el CSV
-ruta_csv = "uso_transporte.csv"
-df = pd.read_csv(ruta_csv)
-
-# Procesamos los datos para obtener las características necesarias
-df[['origen', 'destino']] = df['ruta_popular'].str.split(' - ', expand=True) #Dividimos la ruta en origen y destino
-df['fecha'] = pd.to_datetime(df['fecha']) #Convertimos la fecha a datetime
-df['mes'] = df['fecha'].dt.month #Extraemos el mes de la fecha (factor que utilizaremos para un cálculo aproximado)
-df['dia_semana'] = df['fecha'].dt.dayofweek #Extraemos el día de la semana (factor que utilizaremos para un cálculo aproximado)
-
-# Clasificación de sostenibilidad según el transporte
-sostenibilidad_map = {
-    'Bicicleta': 5,
-    'Tranvía': 4,
-    'Metro': 4,
-    'Autobús': 3,
-    'Coche Compartido': 2,
-    'Avion': 1
-}
-df['sostenibilidad'] = df['tipo_transporte'].map(sostenibilidad_map).fillna(3)
-
-# 4. Normalizamos los valores para el cálculo del score
-df['usuarios_norm'] = df['num_usuarios'] / df['num_usuarios'].max()
-df['tiempo_norm'] = df['tiempo_viaje_promedio_min'] / df['tiempo_viaje_promedio_min'].max()
-df['sostenibilidad_norm'] = df['sostenibilidad'] / 5
-
-# Función para entrenar modelos de Clasificación y Regresión 
-def entrenar_modelos(alpha, beta, gamma, sufijo_modelo):
-    # Calculamos el score según la preferencia de pesos del usuario 
-    df['score'] = (alpha * df['usuarios_norm'] +
-                   beta * (1 - df['tiempo_norm']) +
-                   gamma * df['sostenibilidad_norm'])
-
-    # Lista con los transportes y su correspondiente score 
-    df_top = df.loc[df.groupby(['fecha', 'origen', 'destino'])['score'].idxmax()]
-    
-
-    # Realizamos un encoding de las variables categóricas
-    le_origen = LabelEncoder() 
-    le_destino = LabelEncoder()  
-    le_transporte = LabelEncoder()
-
-    df_top['origen_enc'] = le_origen.fit_transform(df_top['origen'])
-    df_top['destino_enc'] = le_destino.fit_transform(df_top['destino'])
-    df_top['transporte_enc'] = le_transporte.fit_transform(df_top['tipo_transporte'])
-
-    # Definimos el conjunto de entrenamiento del Clasificador
-    X = df_top[['origen_enc', 'destino_enc', 'mes', 'dia_semana']] #Cracterísticas de entrada del modelo
-    y = df_top['transporte_enc'] #Variable objetivo a predecir (tipo de transporte)
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-    #Utilizamos un clasificador RandomForest para clasificar el mejor medio de transporte
-    clf = RandomForestClassifier()
-    clf.fit(X_train, y_train)
-
-    # Guardamos modelo y encoders para la clasificación del transporte según las preferencias del usuario
-    joblib.dump(clf, f'modelo_transporte_{sufijo_modelo}.pkl')
-    joblib.dump(le_origen, f'encoder_origen_{sufijo_modelo}.pkl')
-    joblib.dump(le_destino, f'encoder_destino_{sufijo_modelo}.pkl')
-    joblib.dump(le_transporte, f'encoder_transporte_{sufijo_modelo}.pkl')
-
-    # Usamos un regresor RandomForest para predecir tiempo y usuarios que tendra una ruta en un transporte y fecha específicos
-    reg_time = RandomForestRegressor()
-    reg_users = RandomForestRegressor()
-
-    reg_time.fit(X_train, df_top.loc[X_train.index, 'tiempo_viaje_promedio_min'])
-    reg_users.fit(X_train, df_top.loc[X_train.index, 'num_usuarios'])
-
-    #Guardamos el modelo que nos estimará el tiempo y el número de usuarios
-    joblib.dump(reg_time, f'modelo_tiempo_{sufijo_modelo}.pkl')
-    joblib.dump(reg_users, f'modelo_usuarios_{sufijo_modelo}.pkl')
-
-# Entrenamos 3 modelos según preferencias del usuario
-
-# Modelo Eco -> (Más peso a que sea sostenible)
-entrenar_modelos(alpha=0.2, beta=0.2, gamma=0.6, sufijo_modelo="eco")
-
-# Modelo Eficiencia -> (Más peso a que la ruta tarde lo menos posible)
-entrenar_modelos(alpha=0.2, beta=0.6, gamma=0.2, sufijo_modelo="eficiencia")
-
-# Modelo Popularidad -> (Más peso a que ese transporte sea el más usado en esa fecha/ruta)
-entrenar_modelos(alpha=0.6, beta=0.2, gamma=0.2, sufijo_modelo="popularidad")
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pandas as pd
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+import joblib
+
+# Entrenamiento del predictor de transporte
+# Para cada preferencia del usuario (eco / eficiencia / popularidad) se entrena un clasificador del transporte y
+# dos regresores (tiempo y usuarios). Los 3 × 3 modelos se ajustan en paralelo en un pool de procesos.
+# Uso: python modelos/predictor_rutas_transportes/Entrenamiento_predictor_transportes.py [--n-jobs N] [--semilla S]
+
+DIR_MODELOS = os.path.dirname(os.path.abspath(__file__))
+DIR_RAIZ = os.path.dirname(os.path.dirname(DIR_MODELOS))
+RUTA_CSV = os.path.join(DIR_RAIZ, "baseDatos", "uso_transporte.csv")
+
+# Los pesos (alpha, beta, gamma) de cada preferencia son los mismos que usa la aplicación
+sys.path.insert(0, DIR_RAIZ)
+from registro_modelos import PREFERENCIAS
+
+# Clasificación de sostenibilidad según el transporte
+sostenibilidad_map = {
+    'Bicicleta': 5,
+    'Tranvía': 4,
+    'Metro': 4,
+    'Autobús': 3,
+    'Coche Compartido': 2,
+    'Avion': 1
+}
+
+
+# Leemos el CSV y procesamos los datos para obtener las características necesarias
+def preparar_datos(ruta_csv=RUTA_CSV):
+    df = pd.read_csv(ruta_csv)
+    df[['origen', 'destino']] = df['ruta_popular'].str.split(' - ', expand=True) #Dividimos la ruta en origen y destino
+    df['fecha'] = pd.to_datetime(df['fecha']) #Convertimos la fecha a datetime
+    df['mes'] = df['fecha'].dt.month #Extraemos el mes de la fecha (factor que utilizaremos para un cálculo aproximado)
+    df['dia_semana'] = df['fecha'].dt.dayofweek #Extraemos el día de la semana (factor que utilizaremos para un cálculo aproximado)
+
+    df['sostenibilidad'] = df['tipo_transporte'].map(sostenibilidad_map).fillna(3)
+
+    # Normalizamos los valores para el cálculo del score
+    df['usuarios_norm'] = df['num_usuarios'] / df['num_usuarios'].max()
+    df['tiempo_norm'] = df['tiempo_viaje_promedio_min'] / df['tiempo_viaje_promedio_min'].max()
+    df['sostenibilidad_norm'] = df['sostenibilidad'] / 5
+    return df
+
+
+# Cada fichero se escribe primero junto al definitivo con otro nombre: la aplicación nunca lee un modelo a medio
+# escribir ni ve modelos nuevos mezclados con antiguos
+def ruta_temporal(ruta):
+    return f"{ruta}.{os.getpid()}.tmp"
+
+
+def guardar_temporal(objeto, ruta):
+    temporal = ruta_temporal(ruta)
+    joblib.dump(objeto, temporal)
+    return temporal
+
+
+# Sustituimos todos los ficheros definitivos (temporal -> definitivo) solo cuando se han escrito todos
+def publicar(pendientes):
+    for temporal, ruta in pendientes.items():
+        os.replace(temporal, ruta)
+
+
+def descartar(pendientes):
+    for temporal in pendientes:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+# Conjuntos de entrenamiento y encoders de una preferencia (los encoders se guardan al terminar los modelos)
+def preparar_preferencia(df, alpha, beta, gamma, semilla):
+    # Calculamos el score según la preferencia de pesos del usuario
+    score = (alpha * df['usuarios_norm'] +
+             beta * (1 - df['tiempo_norm']) +
+             gamma * df['sostenibilidad_norm'])
+
+    # Lista con los transportes y su correspondiente score
+    df_top = df.loc[score.groupby([df['fecha'], df['origen'], df['destino']]).idxmax()].copy()
+
+    # Realizamos un encoding de las variables categóricas
+    le_origen = LabelEncoder()
+    le_destino = LabelEncoder()
+    le_transporte = LabelEncoder()
+
+    df_top['origen_enc'] = le_origen.fit_transform(df_top['origen'])
+    df_top['destino_enc'] = le_destino.fit_transform(df_top['destino'])
+    df_top['transporte_enc'] = le_transporte.fit_transform(df_top['tipo_transporte'])
+
+    # Definimos el conjunto de entrenamiento
+    X = df_top[['origen_enc', 'destino_enc', 'mes', 'dia_semana']] #Cracterísticas de entrada del modelo
+    y = df_top['transporte_enc'] #Variable objetivo a predecir (tipo de transporte)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=semilla)
+
+    # Clasificador del mejor medio de transporte y regresores de tiempo y usuarios para esa ruta y fecha
+    conjuntos = {
+        "transporte": (RandomForestClassifier, X_train, y_train),
+        "tiempo": (RandomForestRegressor, X_train, df_top.loc[X_train.index, 'tiempo_viaje_promedio_min']),
+        "usuarios": (RandomForestRegressor, X_train, df_top.loc[X_train.index, 'num_usuarios']),
+    }
+    encoders = {"origen": le_origen, "destino": le_destino, "transporte": le_transporte}
+    return conjuntos, encoders
+
+
+# Ajuste de un único modelo (se ejecuta en un proceso del pool): se guarda en ficheros temporales y se devuelven
+# junto a su ruta definitiva
+def ajustar_modelo(clase_modelo, X_train, y_train, semilla, ruta, compacto):
+    inicio = time.perf_counter()
+    modelo = clase_modelo(random_state=semilla, n_jobs=1)
+    modelo.fit(X_train, y_train)
+    pendientes = {guardar_temporal(modelo, ruta): ruta}
+    if compacto:
+        from bosque_compacto import exportar_bosque, ruta_compacta
+        # Se escribe después del .pkl, así que al publicarlo sigue siendo posterior (ver compacto_vigente)
+        temporal = ruta_temporal(ruta_compacta(ruta))
+        exportar_bosque(modelo).guardar(temporal)
+        pendientes[temporal] = ruta_compacta(ruta)
+    return time.perf_counter() - inicio, pendientes
+
+
+# Entrenamos los 3 modelos de cada preferencia del usuario en paralelo
+def entrenar(n_jobs=None, semilla=42, directorio=DIR_MODELOS, ruta_csv=RUTA_CSV, compacto=False):
+    inicio = time.perf_counter()
+    df = preparar_datos(ruta_csv)
+    tiempos = []
+    encoders = {}
+
+    tareas = {}
+    pendientes = {}  # fichero temporal -> fichero definitivo
+    try:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            for sufijo_modelo, (alpha, beta, gamma) in PREFERENCIAS.items():
+                conjuntos, encoders[sufijo_modelo] = preparar_preferencia(df, alpha, beta, gamma, semilla)
+                for nombre, (clase_modelo, X_train, y_train) in conjuntos.items():
+                    ruta = os.path.join(directorio, f'modelo_{nombre}_{sufijo_modelo}.pkl')
+                    tarea = pool.submit(ajustar_modelo, clase_modelo, X_train, y_train, semilla, ruta, compacto)
+                    tareas[tarea] = (sufijo_modelo, nombre)
+
+            for tarea in as_completed(tareas):
+                sufijo_modelo, nombre = tareas[tarea]
+                segundos, ficheros = tarea.result()
+                pendientes.update(ficheros)
+                tiempos.append({"preferencia": sufijo_modelo, "modelo": nombre, "segundos": segundos})
+                print(f"modelo_{nombre}_{sufijo_modelo}: {segundos:.2f} s")
+
+        for sufijo_modelo, encoders_preferencia in encoders.items():
+            for variable, encoder in encoders_preferencia.items():
+                ruta = os.path.join(directorio, f'encoder_{variable}_{sufijo_modelo}.pkl')
+                pendientes[guardar_temporal(encoder, ruta)] = ruta
+    except BaseException:
+        # Si falla cualquier modelo (result() relanza el error) no se toca ningún fichero definitivo: se borran los
+        # temporales, también los de las tareas que terminaron bien después del fallo
+        for tarea in tareas:
+            if tarea.done() and not tarea.cancelled() and tarea.exception() is None:
+                pendientes.update(tarea.result()[1])
+        descartar(pendientes)
+        raise
+
+    # Modelos y encoders nuevos se publican juntos, solo cuando todos se han ajustado y escrito
+    publicar(pendientes)
+
+    total = time.perf_counter() - inicio
+    print(f"Tiempo total: {total:.2f} s")
+    return pd.DataFrame(tiempos), total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Entrena los modelos del predictor de transporte.")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla de la partición y de los bosques")
+    parser.add_argument("--datos", default=RUTA_CSV, help="CSV de uso de transporte")
+    parser.add_argument("--salida", default=DIR_MODELOS, help="Directorio donde se guardan modelos y encoders")
+    parser.add_argument("--compacto", action="store_true", help="Exporta también cada bosque en formato compacto (.npz)")
+    args = parser.parse_args()
+
+    entrenar(n_jobs=args.n_jobs, semilla=args.semilla, directorio=args.salida, ruta_csv=args.datos, compacto=args.compacto)
@@ -0,0 +1,71 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import joblib
+
+# Comparativa entre los bosques .pkl de sklearn y su versión compacta (bosque_compacto.py):
+# tamaño en disco, tiempo de carga y latencia por fila y por lote, comprobando que las predicciones coinciden.
+# Uso: python modelos/predictor_rutas_transportes/benchmark_bosque_compacto.py
+
+DIR_MODELOS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(os.path.dirname(DIR_MODELOS)))
+from bosque_compacto import BosqueCompacto, exportar_bosque, ruta_compacta, PREFIJOS_BOSQUES
+
+REPETICIONES_FILA = 50
+
+
+def cronometrar(funcion, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones, resultado
+
+
+#Todas las combinaciones origen × destino × mes × día de la semana que ve la aplicación
+def entradas_completas(n_ciudades=10):
+    o, d, m, s = (eje.ravel() for eje in np.indices((n_ciudades, n_ciudades, 12, 7)))
+    return np.column_stack([o, d, m + 1, s])
+
+
+def comparar(ruta_pkl, X):
+    ruta_npz = ruta_compacta(ruta_pkl)
+    if not os.path.exists(ruta_npz):
+        exportar_bosque(joblib.load(ruta_pkl)).guardar(ruta_npz)
+
+    carga_pkl, bosque = cronometrar(lambda: joblib.load(ruta_pkl))
+    carga_npz, compacto = cronometrar(lambda: BosqueCompacto.cargar(ruta_npz))
+
+    fila = X[:1]
+    fila_pkl, _ = cronometrar(lambda: bosque.predict(fila), REPETICIONES_FILA)
+    fila_npz, _ = cronometrar(lambda: compacto.predict(fila), REPETICIONES_FILA)
+    lote_pkl, pred_pkl = cronometrar(lambda: bosque.predict(X))
+    lote_npz, pred_npz = cronometrar(lambda: compacto.predict(X))
+
+    return {
+        "modelo": os.path.basename(ruta_pkl)[:-4],
+        "pkl_MB": os.path.getsize(ruta_pkl) / 1e6,
+        "npz_MB": os.path.getsize(ruta_npz) / 1e6,
+        "carga_pkl_ms": carga_pkl * 1e3,
+        "carga_npz_ms": carga_npz * 1e3,
+        "fila_pkl_ms": fila_pkl * 1e3,
+        "fila_npz_ms": fila_npz * 1e3,
+        f"lote{len(X)}_pkl_ms": lote_pkl * 1e3,
+        f"lote{len(X)}_npz_ms": lote_npz * 1e3,
+        "identicas": bool(np.array_equal(pred_pkl, pred_npz)),
+    }
+
+
+if __name__ == "__main__":
+    X = entradas_completas()
+    filas = [
+        comparar(os.path.join(DIR_MODELOS, fichero), X)
+        for fichero in sorted(os.listdir(DIR_MODELOS))
+        if fichero.endswith(".pkl") and fichero.startswith(PREFIJOS_BOSQUES)
+    ]
+    if not filas:
+        print(f"No hay modelos .pkl en {DIR_MODELOS}: ejecuta antes Entrenamiento_predictor_transportes.py")
+    else:
+        pd.set_option("display.width", 200)
+        print(pd.DataFrame(filas).round(2).to_string(index=False))
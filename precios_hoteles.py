@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import version_tabla
+from cubo_metricas import TABLA_ORIGEN, cubo
+
+# Estimador del precio por noche de los hoteles
+# Se precalcula una tabla (hotel, mes, día) -> {media del último año, media de los últimos 5 años} sobre el
+# histórico de precios, de forma que el precio de cualquier rango de fechas es una única consulta vectorizada.
+
+MODOS = {"Último año": 0, "Últimos 5 años": 1}
+AÑOS_MEDIA = 5
+# Excluir el año 2020 por ser atípico en los datos de ocupación
+AÑOS_EXCLUIDOS = (2020,)
+
+
+#Posición de cada fecha en un calendario de 366 días (el 29 de febrero tiene su propia casilla)
+def posicion_calendario(fechas):
+    fechas = pd.DatetimeIndex(fechas)
+    return np.asarray(fechas.dayofyear - 1 + ((~fechas.is_leap_year) & (fechas.month > 2)))
+
+
+class TablaPrecios:
+    def __init__(self, hoteles, medias):
+        self.hoteles = list(hoteles)
+        self.indice_hotel = {hotel: i for i, hotel in enumerate(self.hoteles)}
+        self.medias = medias  # [hotel, modo, día del calendario]
+
+
+#Construimos la tabla de medias a partir de la métrica de precio del cubo
+def construir_tabla_precios(cubo_hoteles):
+    precios = cubo_hoteles.metrica("precio_promedio_noche")
+    años = np.asarray(cubo_hoteles.fechas.year)
+    validos = ~np.isin(años, AÑOS_EXCLUIDOS)
+
+    lista_años = np.unique(años[validos])
+    id_año = np.searchsorted(lista_años, años[validos])
+    id_dia = posicion_calendario(cubo_hoteles.fechas[validos])
+
+    # Rejilla [hotel, año, día del calendario]; los días sin datos (p. ej. 29 de febrero) quedan como NaN
+    rejilla = np.full((len(cubo_hoteles.hoteles), len(lista_años), 366), np.nan)
+    rejilla[:, id_año, id_dia] = precios[:, validos]
+
+    # Para cada (hotel, día) numeramos los años con datos empezando por el más reciente
+    presentes = ~np.isnan(rejilla)
+    orden_reciente = np.cumsum(presentes[:, ::-1], axis=1)[:, ::-1]
+    valores = np.where(presentes, rejilla, 0.0)
+
+    medias = np.full((len(cubo_hoteles.hoteles), len(MODOS), 366), np.nan)
+    for modo, n_años in ((MODOS["Último año"], 1), (MODOS["Últimos 5 años"], AÑOS_MEDIA)):
+        seleccion = presentes & (orden_reciente <= n_años)
+        n = seleccion.sum(axis=1)
+        suma = np.where(seleccion, valores, 0.0).sum(axis=1)
+        medias[:, modo] = np.divide(suma, n, out=np.full(suma.shape, np.nan), where=n > 0)
+
+    return TablaPrecios(cubo_hoteles.hoteles, medias)
+
+
+#Precio por noche y total estimado de una estancia (NaN en los días sin datos)
+def estimar_precios(tabla, hotel, inicio, fin, modo="Último año"):
+    dias = pd.date_range(inicio, fin)
+    precios = tabla.medias[tabla.indice_hotel[hotel], MODOS[modo], posicion_calendario(dias)]
+    por_noche = pd.Series(precios, index=dias)
+    return por_noche, float(np.nansum(precios))
+
+
+@st.cache_resource
+def cargar_tabla_precios(version=None):
+    return construir_tabla_precios(cubo())
+
+
+def tabla_precios():
+    return cargar_tabla_precios(version_tabla(TABLA_ORIGEN))
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import leer_tabla, normalizar_texto, version_tabla
+
+# Motor de puntuación de rutas turísticas
+# Cada ruta suma el peso de las preferencias que cumple (popularidad, dificultad y duración; el peso depende de la
+# prioridad que les da el usuario: 3, 2 y 1) y solo compiten las rutas del tipo elegido. Aquí el catálogo se guarda
+# como arrays de NumPy y la puntuación de todas las rutas es una operación por columnas, también para un lote de
+# perfiles a la vez (una fila por perfil). Las mejores k se sacan con argpartition; a igual puntuación gana la ruta
+# que va antes en el catálogo, igual que con la ordenación estable de la versión fila a fila.
+
+TABLA = "rutas_turisticas"
+UMBRAL_POPULAR = 4.0
+# Dificultad por distancia: fácil < 25 km, estándar entre 25 y 65 km (incluidos), extremo > 65 km
+DIFICULTADES = ["fácil", "estandar", "extremo"]
+LIMITES_DIFICULTAD = (25.0, 65.0)
+POPULARIDADES = ["popular", "poco popular"]
+PESOS_PRIORIDAD = (3, 2, 1)
+RUTAS_RECOMENDADAS = 5
+
+
+#Peso de cada característica según el orden de prioridad del usuario
+def pesos_prioridad(prioridad):
+    return dict(zip(prioridad, PESOS_PRIORIDAD))
+
+
+#Tramo de dificultad (posición en DIFICULTADES) de cada distancia
+def tramo_dificultad(longitud_km):
+    longitud_km = np.asarray(longitud_km, dtype=float)
+    return np.where(longitud_km < LIMITES_DIFICULTAD[0], 0, np.where(longitud_km <= LIMITES_DIFICULTAD[1], 1, 2))
+
+
+class CatalogoRutas:
+    def __init__(self, rutas):
+        self.rutas = rutas.reset_index(drop=True)
+        # Se normalizan solo los tipos distintos, no cada fila
+        codigos, valores = pd.factorize(self.rutas["tipo_ruta"])
+        normalizados, tipos = pd.factorize(np.array([normalizar_texto(str(v)) for v in valores], dtype=object))
+        self.tipo = normalizados[codigos].astype(np.int32)
+        self.codigo_tipo = {tipo: i for i, tipo in enumerate(tipos)}
+        self.popular = self.rutas["popularidad"].to_numpy(dtype=float) >= UMBRAL_POPULAR
+        self.dificultad = tramo_dificultad(self.rutas["longitud_km"]).astype(np.int8)
+        self.duracion = self.rutas["duracion_hr"].to_numpy(dtype=float)
+
+    def __len__(self):
+        return len(self.tipo)
+
+    #Perfiles (lista de diccionarios con tipo, popularidad, dificultad, duracion=(mín, máx) y prioridad) como
+    #columnas de NumPy con forma [perfil, 1] para combinarlas con las rutas
+    def _columnas(self, perfiles):
+        def columna(valores, dtype):
+            return np.array(valores, dtype=dtype).reshape(-1, 1)
+
+        pesos = [pesos_prioridad(p["prioridad"]) for p in perfiles]
+        return {
+            "tipo": columna([self.codigo_tipo.get(normalizar_texto(p["tipo"]), -1) for p in perfiles], np.int32),
+            "popular": columna([POPULARIDADES.index(p["popularidad"]) for p in perfiles], np.int8),
+            "dificultad": columna([DIFICULTADES.index(p["dificultad"]) for p in perfiles], np.int8),
+            "dur_min": columna([p["duracion"][0] for p in perfiles], float),
+            "dur_max": columna([p["duracion"][1] for p in perfiles], float),
+            "peso_popularidad": columna([w["Popularidad"] for w in pesos], np.int8),
+            "peso_dificultad": columna([w["Dificultad"] for w in pesos], np.int8),
+            "peso_duracion": columna([w["Duración"] for w in pesos], np.int8),
+        }
+
+    #Puntuación de todas las rutas para cada perfil: matriz [perfil, ruta], -1 en las rutas de otro tipo
+    def puntuar(self, perfiles):
+        p = self._columnas(perfiles)
+        # 0 = quiere rutas populares, 1 = poco populares
+        cumple_popularidad = self.popular == (p["popular"] == 0)
+        cumple_dificultad = self.dificultad == p["dificultad"]
+        cumple_duracion = (self.duracion >= p["dur_min"]) & (self.duracion <= p["dur_max"])
+        puntos = (p["peso_popularidad"] * cumple_popularidad + p["peso_dificultad"] * cumple_dificultad +
+                  p["peso_duracion"] * cumple_duracion).astype(np.int8)
+        return np.where(self.tipo == p["tipo"], puntos, np.int8(-1))
+
+    #Las k rutas mejor puntuadas de cada perfil: (posiciones [perfil, k], puntuaciones [perfil, k]), con -1 donde
+    #no hay tantas rutas del tipo
+    def mejores(self, perfiles, k=RUTAS_RECOMENDADAS):
+        puntos = self.puntuar(perfiles)
+        n = len(self)
+        k = min(k, n)
+        if k == 0:
+            vacio = np.empty((len(perfiles), 0), dtype=np.int64)
+            return vacio, vacio
+        # Clave única por ruta: más puntos primero y, a igualdad, la que va antes en el catálogo
+        clave = puntos.astype(np.int64) * n + (n - 1 - np.arange(n))
+        candidatas = np.argpartition(-clave, k - 1, axis=1)[:, :k]
+        orden = np.argsort(-np.take_along_axis(clave, candidatas, axis=1), axis=1)
+        posiciones = np.take_along_axis(candidatas, orden, axis=1)
+        puntuaciones = np.take_along_axis(puntos, posiciones, axis=1).astype(np.int64)
+        posiciones = np.where(puntuaciones >= 0, posiciones, -1)
+        return posiciones, np.where(puntuaciones >= 0, puntuaciones, -1)
+
+    #Las mejores rutas de un único perfil como DataFrame (con su puntuación)
+    def recomendar(self, perfil, k=RUTAS_RECOMENDADAS):
+        posiciones, puntuaciones = self.mejores([perfil], k)
+        validas = posiciones[0] >= 0
+        return self.rutas.iloc[posiciones[0][validas]].assign(puntuacion=puntuaciones[0][validas])
+
+
+def construir_catalogo(rutas=None):
+    return CatalogoRutas(leer_tabla(TABLA) if rutas is None else rutas)
+
+
+#Un único catálogo por proceso y versión de los datos, compartido por todas las sesiones
+@st.cache_resource
+def cargar_catalogo(version=None):
+    return construir_catalogo()
+
+
+def catalogo_rutas():
+    return cargar_catalogo(version_tabla(TABLA))
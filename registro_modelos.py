@@ -0,0 +1,183 @@
+import os
+import time
+import threading
+from collections import namedtuple
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import DIR_BASE
+from bosque_compacto import BosqueCompacto, compacto_vigente, ruta_compacta
+
+# Registro de los modelos del predictor de transporte
+# Cada paquete de preferencia (eco / eficiencia / popularidad) se deserializa una única vez por proceso y se
+# comparte entre todas las sesiones. Guarda además lo que cuesta cada paquete (tiempo de carga y tamaño).
+# Si un bosque tiene su versión compacta (.npz, ver bosque_compacto.py) al día, se carga esa en lugar del .pkl.
+
+DIR_MODELOS = os.path.join(DIR_BASE, "modelos", "predictor_rutas_transportes")
+# Preferencias del usuario y sus pesos (alpha, beta, gamma) de usuarios, tiempo y sostenibilidad: con ellos se
+# entrena cada paquete de modelos y los usan también la red de transporte y la tabla de componentes
+PREFERENCIAS = {
+    # Modelo Eco -> (Más peso a que sea sostenible)
+    "eco": (0.2, 0.2, 0.6),
+    # Modelo Eficiencia -> (Más peso a que la ruta tarde lo menos posible)
+    "eficiencia": (0.2, 0.6, 0.2),
+    # Modelo Popularidad -> (Más peso a que ese transporte sea el más usado en esa fecha/ruta)
+    "popularidad": (0.6, 0.2, 0.2),
+}
+
+# Campo del paquete -> prefijo del fichero .pkl
+COMPONENTES = {
+    "clf": "modelo_transporte",
+    "reg_time": "modelo_tiempo",
+    "reg_users": "modelo_usuarios",
+    "le_origen": "encoder_origen",
+    "le_destino": "encoder_destino",
+    "le_transporte": "encoder_transporte",
+}
+
+ModelosTransporte = namedtuple("ModelosTransporte", list(COMPONENTES))
+
+
+#Tamaño aproximado en memoria de un objeto cargado, sin serializarlo: los árboles de sklearn guardan sus nodos y
+#sus valores en arrays contiguos (los que devuelve su estado público), y el bosque compacto y los encoders son
+#arrays de NumPy
+def tamaño_memoria(objeto):
+    if hasattr(objeto, "estimators_"):
+        return sum(tamaño_memoria(estimador) for estimador in objeto.estimators_)
+    if hasattr(objeto, "tree_"):
+        estado = objeto.tree_.__getstate__()
+        return estado["nodes"].nbytes + estado["values"].nbytes
+    return sum(valor.nbytes for valor in vars(objeto).values() if isinstance(valor, np.ndarray))
+
+
+#Huella de los ficheros de modelos de una preferencia: si cambia alguno, hay que volver a cargarlos
+def huella_modelos(directorio, preferencia):
+    huella = []
+    for prefijo in COMPONENTES.values():
+        estado = os.stat(os.path.join(directorio, f"{prefijo}_{preferencia}.pkl"))
+        huella.append([estado.st_mtime_ns, estado.st_size])
+    return np.array(huella, dtype=np.int64)
+
+
+#Versión de los modelos desplegados: huella de cada preferencia (None si faltan sus ficheros)
+def version_modelos(directorio=DIR_MODELOS):
+    version = []
+    for preferencia in PREFERENCIAS:
+        try:
+            version.append(huella_modelos(directorio, preferencia).tobytes())
+        except FileNotFoundError:
+            version.append(None)
+    return tuple(version)
+
+
+class RegistroModelos:
+    def __init__(self, directorio=DIR_MODELOS):
+        self.directorio = directorio
+        self._paquetes = {}
+        self._estadisticas = {}
+        self._errores = {}
+        self._cerrojos = {preferencia: threading.Lock() for preferencia in PREFERENCIAS}
+        self._precalentamiento = None
+
+    def ruta(self, componente, preferencia):
+        return os.path.join(self.directorio, f"{COMPONENTES[componente]}_{preferencia}.pkl")
+
+    #Devolvemos el paquete de una preferencia, cargándolo solo la primera vez
+    def obtener(self, preferencia):
+        preferencia = preferencia.lower()
+        paquete = self._paquetes.get(preferencia)
+        if paquete is not None:
+            return paquete
+        # Un cerrojo por preferencia: dos sesiones que piden el mismo paquete a la vez lo cargan una sola vez
+        with self._cerrojos[preferencia]:
+            if preferencia not in self._paquetes:
+                self._paquetes[preferencia] = self._cargar(preferencia)
+        return self._paquetes[preferencia]
+
+    def _cargar(self, preferencia):
+        componentes = {}
+        detalle = {}
+        for componente in COMPONENTES:
+            ruta = self.ruta(componente, preferencia)
+            inicio = time.perf_counter()
+            if compacto_vigente(ruta):
+                ruta = ruta_compacta(ruta)
+                componentes[componente] = BosqueCompacto.cargar(ruta)
+            else:
+                componentes[componente] = joblib.load(ruta)
+            detalle[componente] = {
+                "tiempo_carga_s": time.perf_counter() - inicio,
+                "disco_bytes": os.path.getsize(ruta),
+                "memoria_bytes": tamaño_memoria(componentes[componente]),
+            }
+
+        self._estadisticas[preferencia] = detalle
+        self._errores.pop(preferencia, None)
+        return ModelosTransporte(**componentes)
+
+    def cargado(self, preferencia):
+        return preferencia.lower() in self._paquetes
+
+    #Carga anticipada de los paquetes (por defecto en un hilo en segundo plano); solo se lanza una vez
+    def precalentar(self, preferencias=PREFERENCIAS, en_segundo_plano=True):
+        if self._precalentamiento is not None:
+            return self._precalentamiento
+
+        def cargar_todos():
+            for preferencia in preferencias:
+                try:
+                    self.obtener(preferencia)
+                except Exception as e:
+                    self._errores[preferencia] = repr(e)
+
+        if en_segundo_plano:
+            self._precalentamiento = threading.Thread(target=cargar_todos, name="precalentar_modelos", daemon=True)
+            self._precalentamiento.start()
+        else:
+            cargar_todos()
+            self._precalentamiento = True
+        return self._precalentamiento
+
+    #Coste de cada paquete cargado: una fila por preferencia y componente
+    def estadisticas(self):
+        filas = [
+            {"preferencia": preferencia, "componente": componente, **valores}
+            for preferencia, detalle in self._estadisticas.items()
+            for componente, valores in detalle.items()
+        ]
+        return pd.DataFrame(filas, columns=["preferencia", "componente", "tiempo_carga_s", "disco_bytes", "memoria_bytes"])
+
+    #Totales por paquete
+    def resumen(self):
+        return self.estadisticas().groupby("preferencia")[["tiempo_carga_s", "disco_bytes", "memoria_bytes"]].sum()
+
+    def errores(self):
+        return dict(self._errores)
+
+
+#Un único registro por proceso y versión de los modelos, compartido por todas las sesiones: al reentrenar se crea
+#uno nuevo y se libera el anterior (max_entries=1), que tiene los bosques antiguos en memoria
+@st.cache_resource(max_entries=1)
+def cargar_registro(version=None):
+    return RegistroModelos()
+
+
+def registro():
+    return cargar_registro(version_modelos())
+
+
+#Precalentamiento opcional al arrancar la aplicación (variable de entorno PRECALENTAR_MODELOS=1)
+def precalentar_al_arrancar():
+    if os.environ.get("PRECALENTAR_MODELOS", "0") not in ("", "0"):
+        registro().precalentar()
+
+
+if __name__ == "__main__":
+    # Coste de carga de cada paquete: python registro_modelos.py
+    reg = RegistroModelos()
+    reg.precalentar(en_segundo_plano=False)
+    for preferencia, error in reg.errores().items():
+        print(f"{preferencia}: {error}")
+    print(reg.estadisticas().to_string(index=False))
+    print(reg.resumen().to_string())
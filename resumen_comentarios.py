@@ -0,0 +1,282 @@
+import os
+import re
+import json
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import scipy.sparse as sp
+import streamlit as st
+from datos import DIR_CACHE, convertir_tabla, normalizar_texto, version_tabla
+
+# Resumen de "lo que dicen los viajeros" de cada servicio
+# Proceso por lotes sobre los comentarios de opiniones_turisticas: se leen por trozos del Parquet y, de cada trozo,
+# se acumulan las frecuencias de términos (palabras y parejas de palabras) de cada servicio con un producto disperso
+# indicador de servicio × matriz documento-término, la frecuencia documental de cada término y el número de frases
+# positivas y negativas. La memoria solo depende del tamaño del lote y del vocabulario, no del número de opiniones.
+# Al final el IDF se aplica sobre los acumulados (es un factor por término) y se eligen las palabras clave de cada
+# servicio. El resultado se guarda en disco con la versión de los datos, así las páginas no hacen ningún cálculo.
+
+TABLA = "opiniones_turisticas"
+RUTA_RESUMEN = os.path.join(DIR_CACHE, "resumen_comentarios.json")
+TAMAÑO_LOTE = 50_000
+PALABRAS_CLAVE = 8
+
+# Los comentarios que no se pudieron generar no aportan nada al resumen
+PREFIJO_ERROR = "[error:"
+# Las frases se separan por signos de puntuación seguidos de espacio (no en abreviaturas como "S.L.")
+PATRON_FRASE = re.compile(r"[.!?¡¿;,:]+(?:\s+|$)")
+PATRON_PALABRA = re.compile(r"[^\W\d_]+")
+
+PALABRAS_VACIAS = {
+    "que", "con", "por", "para", "una", "uno", "unos", "unas", "los", "las", "del", "al", "el", "la", "lo", "le",
+    "les", "se", "su", "sus", "nos", "nuestro", "nuestra", "nuestros", "nuestras", "mi", "mis", "me", "te", "tu",
+    "muy", "mas", "pero", "aunque", "como", "este", "esta", "estos", "estas", "ese", "esa", "eso", "esto", "era",
+    "fue", "fueron", "ser", "son", "es", "estaba", "estuvo", "hay", "hubo", "han", "ha", "habia", "todo", "toda",
+    "todos", "todas", "tambien", "cuando", "donde", "desde", "hasta", "sobre", "entre", "sin", "solo", "ya", "asi",
+    "bien", "mucho", "mucha", "muchos", "muchas", "poco", "algo", "algunas", "algunos", "cada", "otro", "otra",
+    "otros", "otras", "porque", "pues", "tan", "tanto", "general", "experiencia", "servicio", "nada", "ni", "no",
+    "si", "sido", "ademas", "vez", "veces", "aqui", "alli", "ahi", "cual", "quien", "the", "and", "was", "for",
+    "with", "amb", "per", "els", "molt", "duda",
+}
+
+# Léxico de polaridad (texto normalizado: sin tildes y en minúsculas)
+POSITIVAS = {
+    "excelente", "increible", "agradable", "recomendable", "recomiendo", "recomendamos", "fascinante",
+    "fascinantes", "delicioso", "deliciosa", "informativo", "informado", "impecable", "impecables", "moderna",
+    "modernas", "organizada", "organizado", "comodo", "comoda", "comodos", "comodas", "amable", "amables", "atento",
+    "atentos", "atenta", "rapido", "rapida", "impresionante", "impresionantes", "disfrutamos", "disfrute", "buena",
+    "bueno", "buen", "volvere", "volveremos", "espectacular", "imprescindible", "inolvidable", "gran", "mejor",
+    "genial", "perfecto", "perfecta", "fantastico", "fantastica", "maravilloso", "maravillosa", "encantado",
+    "encanto", "limpio", "limpia", "interesante", "disponible", "wow", "gracias", "profesional",
+}
+NEGATIVAS = {
+    "malo", "malos", "malas", "pesimo", "pesima", "horrible", "decepcionante", "decepcion",
+    "deficiente", "sucio", "sucia", "sucias", "sucios", "descuidado", "descuidadas", "descuidados", "incomodo",
+    "incomoda", "incomodos", "cerrado", "cerrados", "cerrada", "excesivo", "ruido", "esperas", "esperaba",
+    "demasiado", "falta", "faltaban", "mejorar", "mejora", "debajo", "eviten", "retraso", "lento", "lenta", "corto",
+    "corta", "malentendido", "renovacion", "desastre", "peor", "problema", "problemas", "caro", "cara",
+}
+# Una palabra positiva justo después de una de estas (a dos palabras como mucho) cuenta como negativa ("no lo
+# recomiendo", "personal poco amable", "mal organizada"); sin una positiva detrás, la propia palabra resta
+# ("nunca más", "mala ubicación", "de baja calidad")
+NEGACIONES = {"no", "nunca", "poco", "nada", "ni", "mal", "mala", "baja"}
+
+
+#Frases de un comentario, cada una como lista de palabras en minúsculas (con sus tildes)
+def frases(texto):
+    return [PATRON_PALABRA.findall(frase) for frase in PATRON_FRASE.split(texto.lower()) if frase.strip()]
+
+
+#Las palabras se repiten mucho: cada una se normaliza una sola vez
+@lru_cache(maxsize=100_000)
+def normalizar_palabra(palabra):
+    return normalizar_texto(palabra)
+
+
+#Polaridad de una frase: +1 positiva, -1 negativa, 0 neutra
+def polaridad(palabras):
+    puntos = 0
+    for i, palabra in enumerate(palabras):
+        if palabra in NEGACIONES:
+            if not any(p in POSITIVAS for p in palabras[i + 1:i + 3]):
+                puntos -= 1
+        elif palabra in POSITIVAS:
+            negada = any(p in NEGACIONES for p in palabras[max(i - 2, 0):i])
+            puntos += -1 if negada else 1
+        elif palabra in NEGATIVAS:
+            puntos -= 1
+    return int(np.sign(puntos))
+
+
+def util(palabra):
+    return len(palabra) > 2 and palabra not in PALABRAS_VACIAS
+
+
+#Términos de una frase: palabras que no son vacías y parejas de ellas que van seguidas en el texto, como pares
+#(término normalizado, forma con tildes para mostrarlo)
+def terminos(palabras, originales):
+    return ([(p, o) for p, o in zip(palabras, originales) if util(p)] +
+            [(f"{a} {b}", f"{oa} {ob}") for a, b, oa, ob in zip(palabras, palabras[1:], originales, originales[1:])
+             if util(a) and util(b)])
+
+
+class AcumuladorComentarios:
+    def __init__(self):
+        self.vocabulario = {}  # término -> columna
+        self.formas = []  # columna -> primera forma del término que apareció (con tildes)
+        self.servicios = {}  # nombre del servicio -> fila
+        self.tipos = {}  # nombre del servicio -> tipo_servicio
+        # Suma por servicio de las frecuencias relativas de cada término en sus comentarios
+        self.frecuencias = sp.csr_matrix((0, 0))
+        self.frecuencia_documental = np.zeros(0, dtype=np.int64)
+        self.documentos = np.zeros(0, dtype=np.int64)  # comentarios útiles por servicio
+        self.frases = np.zeros(0, dtype=np.int64)
+        self.positivas = np.zeros(0, dtype=np.int64)
+        self.negativas = np.zeros(0, dtype=np.int64)
+
+    def _fila(self, nombre, tipo):
+        fila = self.servicios.get(nombre)
+        if fila is None:
+            fila = self.servicios[nombre] = len(self.servicios)
+            self.tipos[nombre] = tipo
+        return fila
+
+    def _columna(self, termino, forma):
+        columna = self.vocabulario.get(termino)
+        if columna is None:
+            columna = self.vocabulario[termino] = len(self.vocabulario)
+            self.formas.append(forma)
+        return columna
+
+    @staticmethod
+    def _ampliar(array, longitud):
+        return np.concatenate([array, np.zeros(longitud - len(array), dtype=array.dtype)])
+
+    #Un lote de opiniones: solo se guarda lo acumulado, el lote se descarta después
+    def anadir(self, opiniones):
+        columnas, docs = [], []
+        servicio_doc, frases_doc, positivas_doc, negativas_doc = [], [], [], []
+        for nombre, tipo, comentario in zip(opiniones["nombre_servicio"].astype(str).tolist(),
+                                            opiniones["tipo_servicio"].astype(str).tolist(),
+                                            opiniones["comentario"].astype(str).tolist()):
+            if comentario.lower().startswith(PREFIJO_ERROR):
+                continue
+            doc = len(servicio_doc)
+            servicio_doc.append(self._fila(nombre, tipo))
+            polaridades = []
+            for originales in frases(comentario):
+                palabras = [normalizar_palabra(p) for p in originales]
+                polaridades.append(polaridad(palabras))
+                columnas.extend(self._columna(t, f) for t, f in terminos(palabras, originales))
+            docs.extend([doc] * (len(columnas) - len(docs)))
+            frases_doc.append(len(polaridades))
+            positivas_doc.append(polaridades.count(1))
+            negativas_doc.append(polaridades.count(-1))
+
+        n_servicios, n_terminos, n_docs = len(self.servicios), len(self.vocabulario), len(servicio_doc)
+        servicio_doc = np.array(servicio_doc, dtype=np.int64)
+
+        # Matriz documento × término con la frecuencia relativa de cada término en su comentario
+        conteos = sp.csr_matrix((np.ones(len(columnas)), (docs, columnas)), shape=(n_docs, n_terminos))
+        conteos.sum_duplicates()
+        longitudes = np.asarray(conteos.sum(axis=1)).ravel()
+        tf = sp.diags(np.divide(1.0, longitudes, out=np.zeros(n_docs), where=longitudes > 0)) @ conteos
+
+        # Reducción por servicio: indicador servicio × documento por la matriz documento × término
+        indicador = sp.csr_matrix((np.ones(n_docs), (servicio_doc, np.arange(n_docs))), shape=(n_servicios, n_docs))
+        self.frecuencias.resize((n_servicios, n_terminos))
+        self.frecuencias = (self.frecuencias + indicador @ tf).tocsr()
+
+        self.frecuencia_documental = self._ampliar(self.frecuencia_documental, n_terminos)
+        self.frecuencia_documental += np.bincount(conteos.indices, minlength=n_terminos)
+        for atributo, valores in (("documentos", np.ones(n_docs, dtype=np.int64)), ("frases", frases_doc),
+                                  ("positivas", positivas_doc), ("negativas", negativas_doc)):
+            acumulado = self._ampliar(getattr(self, atributo), n_servicios)
+            acumulado += np.bincount(servicio_doc, weights=valores, minlength=n_servicios).astype(np.int64)
+            setattr(self, atributo, acumulado)
+        return self
+
+    #Palabras clave (TF-IDF medio de sus comentarios) y reparto de frases positivas/negativas de cada servicio
+    def resumen(self, palabras_clave=PALABRAS_CLAVE):
+        n_documentos = self.documentos.sum()
+        idf = np.log((1 + n_documentos) / (1 + self.frecuencia_documental)) + 1
+        tfidf = (sp.diags(1.0 / np.maximum(self.documentos, 1)) @ self.frecuencias @ sp.diags(idf)).tocsr()
+        terminos_vocabulario = list(self.vocabulario)
+
+        filas = []
+        for nombre, fila in self.servicios.items():
+            inicio, fin = tfidf.indptr[fila], tfidf.indptr[fila + 1]
+            columnas, pesos = tfidf.indices[inicio:fin], tfidf.data[inicio:fin]
+            # Las palabras del propio nombre del servicio no describen nada
+            propias = set(normalizar_texto(nombre).split())
+            claves, cubiertas = [], set()
+            for columna in columnas[np.lexsort((columnas, -pesos))]:
+                palabras = set(terminos_vocabulario[columna].split())
+                # Tampoco se repite una palabra que ya sale en otra palabra clave ("personal atento" y "atento")
+                if propias.isdisjoint(palabras) and not palabras <= cubiertas:
+                    claves.append(self.formas[columna])
+                    cubiertas |= palabras
+                if len(claves) == palabras_clave:
+                    break
+            frases_servicio = max(int(self.frases[fila]), 1)
+            filas.append({
+                "nombre_servicio": nombre,
+                "tipo_servicio": self.tipos[nombre],
+                "opiniones": int(self.documentos[fila]),
+                "palabras_clave": claves,
+                "frases": int(self.frases[fila]),
+                "cuota_positiva": self.positivas[fila] / frases_servicio,
+                "cuota_negativa": self.negativas[fila] / frases_servicio,
+            })
+        return pd.DataFrame(filas).sort_values("nombre_servicio", ignore_index=True)
+
+
+#Opiniones por lotes leídos del Parquet (nunca se carga la tabla entera)
+def lotes_opiniones(tamaño_lote=TAMAÑO_LOTE):
+    parquet = pq.ParquetFile(convertir_tabla(TABLA))
+    for lote in parquet.iter_batches(batch_size=tamaño_lote,
+                                     columns=["tipo_servicio", "nombre_servicio", "comentario"]):
+        yield lote.to_pandas()
+
+
+def construir_resumen_comentarios(lotes=None):
+    acumulador = AcumuladorComentarios()
+    for lote in (lotes_opiniones() if lotes is None else lotes):
+        acumulador.anadir(lote)
+    return acumulador.resumen()
+
+
+def guardar(resumen, version, ruta=RUTA_RESUMEN):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump({"version": version, "servicios": resumen.to_dict(orient="records")}, f, ensure_ascii=False)
+    os.replace(temporal, ruta)
+
+
+#Resumen guardado en disco si es de la versión actual de los datos; si no, se recalcula y se guarda
+def resumen_guardado(forzar=False):
+    version = version_tabla(TABLA)
+    if not forzar and os.path.exists(RUTA_RESUMEN):
+        with open(RUTA_RESUMEN, encoding="utf-8") as f:
+            datos = json.load(f)
+        if datos["version"] == version:
+            return pd.DataFrame(datos["servicios"])
+    resumen = construir_resumen_comentarios()
+    guardar(resumen, version)
+    return resumen
+
+
+@st.cache_data
+def cargar_resumen_comentarios(version=None):
+    return resumen_guardado().set_index("nombre_servicio")
+
+
+def resumen_comentarios():
+    return cargar_resumen_comentarios(version_tabla(TABLA))
+
+
+#Resumen de un servicio para las páginas: palabras clave y reparto de frases positivas y negativas
+def mostrar_resumen_comentarios(servicio):
+    resumen = resumen_comentarios()
+    if servicio not in resumen.index:
+        return
+    fila = resumen.loc[servicio]
+    etiquetas = " ".join(
+        f"<span style='background-color:#e8f5e9; border:1px solid #a5d6a7; border-radius:12px; padding:2px 10px; "
+        f"margin:2px; display:inline-block;'>{termino}</span>"
+        for termino in fila["palabras_clave"]
+    )
+    st.markdown(f"""
+    <div style="background-color:#f5f5f5; padding:12px; border-radius:10px; border:1px solid #ccc; margin-bottom:10px;">
+        <strong>💡 Lo que más se comenta</strong><br>{etiquetas}<br>
+        👍 {fila["cuota_positiva"]:.0%} de las frases son positivas &nbsp; · &nbsp;
+        👎 {fila["cuota_negativa"]:.0%} son negativas
+    </div>
+    """, unsafe_allow_html=True)
+
+
+if __name__ == "__main__":
+    # Recalcular el resumen: python resumen_comentarios.py
+    print(resumen_guardado(forzar=True).to_string())
@@ -0,0 +1,198 @@
+import os
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datos import DIR_CACHE, leer_tabla, version_tabla
+
+# Resumen materializado de las opiniones por servicio
+# Una fila por servicio con su tipo, su descripción, el número de opiniones, la suma de puntuaciones, la media y el
+# histograma de estrellas. Se construye una vez a partir de opiniones_turisticas y se guarda en disco junto a la
+# versión de los datos, el número de opiniones contadas y una huella de esas filas. Cuando cambia la versión y las
+# filas ya contadas siguen igual, cada opinión nueva lo actualiza en tiempo constante (anadir) sin volver a agregar
+# la tabla; solo se reconstruye si ha cambiado alguna de las filas anteriores.
+
+TABLA = "opiniones_turisticas"
+RUTA_RESUMEN = os.path.join(DIR_CACHE, "resumen_servicios.json")
+ESTRELLAS = range(1, 6)
+# Columnas de las que depende el resumen (las que entran en la huella de las filas contadas)
+COLUMNAS = ["nombre_servicio", "tipo_servicio", "puntuacion"]
+
+ORDENES = {
+    "Puntuación (de mayor a menor)": ("puntuacion", False),
+    "Puntuación (de menor a mayor)": ("puntuacion", True),
+    "Número de opiniones": ("num_opiniones", False),
+}
+
+
+#Descripción que se muestra del servicio: el tipo para hoteles y rutas, la última palabra del nombre para el resto
+def descripcion_servicio(nombre, tipo):
+    descripcion = tipo if tipo in ['Hotel', 'Ruta'] else nombre.split()[-1]
+    return 'Tour Guiado' if descripcion == 'Guiado' else descripcion
+
+
+#Hash de cada opinión (solo las columnas del resumen) y huella de un bloque de filas
+def hashes_opiniones(opiniones):
+    return pd.util.hash_pandas_object(opiniones[COLUMNAS], index=False).to_numpy()
+
+
+def huella(hashes):
+    return hashlib.sha1(hashes.tobytes()).hexdigest()
+
+
+class ResumenServicios:
+    def __init__(self, version=None):
+        self.version = version
+        self.filas = 0  # opiniones contadas (las primeras filas de la tabla)
+        self.huella = huella(np.empty(0, dtype=np.uint64))
+        self.indice = {}  # nombre del servicio -> posición
+        self.nombres = []
+        self.tipos = []
+        self.descripciones = []
+        self.cuenta = []
+        self.suma = []
+        self.histograma = []  # [1★, 2★, 3★, 4★, 5★] por servicio
+
+    #Alta de una opinión: una búsqueda en el diccionario y cuatro sumas
+    def anadir(self, nombre, tipo, puntuacion):
+        posicion = self.indice.get(nombre)
+        if posicion is None:
+            posicion = self.indice[nombre] = len(self.nombres)
+            self.nombres.append(nombre)
+            self.tipos.append(tipo)
+            self.descripciones.append(descripcion_servicio(nombre, tipo))
+            self.cuenta.append(0)
+            self.suma.append(0)
+            self.histograma.append([0] * len(ESTRELLAS))
+        self.cuenta[posicion] += 1
+        self.suma[posicion] += puntuacion
+        estrella = min(max(int(puntuacion), ESTRELLAS[0]), ESTRELLAS[-1])
+        self.histograma[posicion][estrella - 1] += 1
+        return self
+
+    #Construcción completa con una única agregación de la tabla
+    @classmethod
+    def desde_opiniones(cls, opiniones, version=None):
+        resumen = cls(version)
+        estrellas = opiniones["puntuacion"].astype(int).clip(ESTRELLAS[0], ESTRELLAS[-1])
+        histograma = pd.crosstab(opiniones["nombre_servicio"].astype(str), estrellas).reindex(
+            columns=list(ESTRELLAS), fill_value=0)
+        agregados = opiniones.groupby(opiniones["nombre_servicio"].astype(str)).agg(
+            tipo=("tipo_servicio", "first"), cuenta=("puntuacion", "size"), suma=("puntuacion", "sum"))
+
+        resumen.nombres = agregados.index.tolist()
+        resumen.indice = {nombre: i for i, nombre in enumerate(resumen.nombres)}
+        resumen.tipos = agregados["tipo"].astype(str).tolist()
+        resumen.descripciones = [descripcion_servicio(n, t) for n, t in zip(resumen.nombres, resumen.tipos)]
+        resumen.cuenta = agregados["cuenta"].tolist()
+        resumen.suma = agregados["suma"].tolist()
+        resumen.histograma = histograma.loc[resumen.nombres].to_numpy().tolist()
+        resumen.filas, resumen.huella = len(opiniones), huella(hashes_opiniones(opiniones))
+        return resumen
+
+    #Resumen al día con la tabla: si las opiniones ya contadas siguen igual al principio solo se añaden las nuevas;
+    #si no, se reconstruye
+    def actualizar(self, opiniones, version=None):
+        hashes = hashes_opiniones(opiniones)
+        if len(opiniones) < self.filas or huella(hashes[:self.filas]) != self.huella:
+            return ResumenServicios.desde_opiniones(opiniones, version)
+        nuevas = opiniones.iloc[self.filas:]
+        for nombre, tipo, puntuacion in zip(nuevas["nombre_servicio"].astype(str).tolist(),
+                                            nuevas["tipo_servicio"].astype(str).tolist(),
+                                            nuevas["puntuacion"].tolist()):
+            self.anadir(nombre, tipo, puntuacion)
+        self.version, self.filas, self.huella = version, len(opiniones), huella(hashes)
+        return self
+
+    #Tabla completa (ordenada por nombre del servicio)
+    def tabla(self):
+        df = pd.DataFrame({
+            "nombre_servicio": self.nombres,
+            "tipo_servicio": self.tipos,
+            "descripcion_servicio": self.descripciones,
+            "num_opiniones": self.cuenta,
+            "suma_puntuacion": self.suma,
+        })
+        df["puntuacion"] = df["suma_puntuacion"] / df["num_opiniones"]
+        for estrella in ESTRELLAS:
+            df[f"estrellas_{estrella}"] = [histograma[estrella - 1] for histograma in self.histograma]
+        return df.sort_values("nombre_servicio", ignore_index=True)
+
+    def guardar(self, ruta=RUTA_RESUMEN):
+        datos = {
+            "version": self.version,
+            "filas": self.filas,
+            "huella": self.huella,
+            "servicios": [
+                {"nombre": n, "tipo": t, "cuenta": c, "suma": s, "histograma": h}
+                for n, t, c, s, h in zip(self.nombres, self.tipos, self.cuenta, self.suma, self.histograma)
+            ],
+        }
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(datos, f, ensure_ascii=False)
+        os.replace(temporal, ruta)
+
+    @classmethod
+    def cargar(cls, ruta=RUTA_RESUMEN):
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        resumen = cls(datos["version"])
+        # Un resumen guardado sin filas ni huella no coincide con ninguna tabla y se reconstruye al actualizarlo
+        resumen.filas, resumen.huella = datos.get("filas", 0), datos.get("huella")
+        for servicio in datos["servicios"]:
+            resumen.indice[servicio["nombre"]] = len(resumen.nombres)
+            resumen.nombres.append(servicio["nombre"])
+            resumen.tipos.append(servicio["tipo"])
+            resumen.descripciones.append(descripcion_servicio(servicio["nombre"], servicio["tipo"]))
+            resumen.cuenta.append(servicio["cuenta"])
+            resumen.suma.append(servicio["suma"])
+            resumen.histograma.append(servicio["histograma"])
+        return resumen
+
+
+#Servicios de unos tipos con media (redondeada) mínima, en el orden pedido
+def consultar(tabla, tipos=None, descripcion=None, puntuacion_minima=0.0, orden=None, decimales=1):
+    seleccion = tabla
+    if tipos is not None:
+        seleccion = seleccion[seleccion["tipo_servicio"].isin(tipos)]
+    if descripcion is not None:
+        seleccion = seleccion[seleccion["descripcion_servicio"] == descripcion]
+    seleccion = seleccion.assign(puntuacion=seleccion["puntuacion"].round(decimales))
+    seleccion = seleccion[seleccion["puntuacion"] >= puntuacion_minima]
+    if orden in ORDENES:
+        columna, ascendente = ORDENES[orden]
+        seleccion = seleccion.sort_values(by=columna, ascending=ascendente)
+    return seleccion
+
+
+#Resumen guardado en disco si es de la versión actual de los datos; si no, se le añaden las opiniones nuevas (o se
+#reconstruye si han cambiado las anteriores) y se guarda
+def construir_resumen(forzar=False):
+    version = version_tabla(TABLA)
+    if not forzar and os.path.exists(RUTA_RESUMEN):
+        resumen = ResumenServicios.cargar()
+        if resumen.version == version:
+            return resumen
+        resumen = resumen.actualizar(leer_tabla(TABLA), version)
+    else:
+        resumen = ResumenServicios.desde_opiniones(leer_tabla(TABLA), version)
+    resumen.guardar()
+    return resumen
+
+
+#Tabla del resumen por proceso y versión de los datos, compartida por todas las sesiones
+@st.cache_data
+def cargar_tabla_resumen(version=None):
+    return construir_resumen().tabla()
+
+
+def tabla_resumen():
+    return cargar_tabla_resumen(version_tabla(TABLA))
+
+
+if __name__ == "__main__":
+    # Reconstrucción del resumen: python resumen_servicios.py
+    print(construir_resumen(forzar=True).tabla().to_string())
@@ -0,0 +1,103 @@
+import os
+import numpy as np
+import pandas as pd
+import streamlit as st
+from sklearn.neighbors import KDTree
+from datos import DIR_CACHE, leer_tabla, normalizar_texto, version_tabla
+from puntuacion_rutas import TABLA
+
+# Rutas parecidas a una dada
+# Cada ruta es un punto (longitud_km, duracion_hr, popularidad) con cada eje escalado a [0, 1] sobre el catálogo, y
+# las parecidas son sus vecinas más cercanas en un KD-tree: uno con todas las rutas y uno por tipo de ruta para
+# buscar solo entre las del mismo tipo. Los árboles se construyen una vez por versión de los datos y se comparten
+# entre sesiones; las consultas admiten lotes de rutas para precalcular las vecinas de todo el catálogo.
+
+CARACTERISTICAS = ["longitud_km", "duracion_hr", "popularidad"]
+RUTAS_SIMILARES = 3
+RUTA_VECINAS = os.path.join(DIR_CACHE, "rutas_similares.npz")
+
+
+class RutasSimilares:
+    def __init__(self, rutas):
+        self.rutas = rutas.reset_index(drop=True)
+        valores = self.rutas[CARACTERISTICAS].to_numpy(dtype=float)
+        minimo, maximo = valores.min(axis=0), valores.max(axis=0)
+        self.puntos = (valores - minimo) / np.where(maximo > minimo, maximo - minimo, 1.0)
+
+        codigos, valores_tipo = pd.factorize(self.rutas["tipo_ruta"])
+        normalizados, tipos = pd.factorize(np.array([normalizar_texto(str(v)) for v in valores_tipo], dtype=object))
+        self.tipo = normalizados[codigos]
+        self.codigo_tipo = {tipo: i for i, tipo in enumerate(tipos)}
+
+        # Árbol de todo el catálogo y uno por tipo (con la posición en el catálogo de cada punto)
+        self.arbol = KDTree(self.puntos)
+        self.miembros = [np.flatnonzero(self.tipo == codigo) for codigo in range(len(tipos))]
+        self.arboles_tipo = [KDTree(self.puntos[miembros]) for miembros in self.miembros]
+
+    def __len__(self):
+        return len(self.puntos)
+
+    #Vecinas de un lote de rutas del catálogo (sin contar la propia ruta): (posiciones [ruta, k], distancias [ruta, k]),
+    #con -1 / inf donde no hay suficientes rutas
+    def vecinas(self, posiciones, k=RUTAS_SIMILARES, mismo_tipo=False):
+        posiciones = np.atleast_1d(np.asarray(posiciones, dtype=np.int64))
+        resultado = np.full((len(posiciones), k), -1, dtype=np.int64)
+        distancias = np.full((len(posiciones), k), np.inf)
+        if mismo_tipo:
+            grupos = [(np.flatnonzero(self.tipo[posiciones] == codigo), arbol, self.miembros[codigo])
+                      for codigo, arbol in enumerate(self.arboles_tipo)]
+        else:
+            grupos = [(np.arange(len(posiciones)), self.arbol, None)]
+
+        for filas, arbol, miembros in grupos:
+            if len(filas) == 0:
+                continue
+            n = arbol.data.shape[0]
+            d, vecinas = arbol.query(self.puntos[posiciones[filas]], k=min(k + 1, n))
+            if miembros is not None:
+                vecinas = miembros[vecinas]
+            # Se quita la propia ruta (o la última si la ruta no ha salido por haber puntos repetidos)
+            propia = vecinas == posiciones[filas, None]
+            propia[~propia.any(axis=1), -1] = True
+            vecinas = vecinas[~propia].reshape(len(filas), -1)
+            d = d[~propia].reshape(len(filas), -1)
+            resultado[filas, :vecinas.shape[1]] = vecinas
+            distancias[filas, :d.shape[1]] = d
+        return resultado, distancias
+
+    #Rutas parecidas a la de la posición dada como DataFrame (con la distancia)
+    def similares(self, posicion, k=RUTAS_SIMILARES, mismo_tipo=False):
+        vecinas, distancias = self.vecinas([posicion], k, mismo_tipo)
+        validas = vecinas[0] >= 0
+        return self.rutas.iloc[vecinas[0][validas]].assign(distancia=distancias[0][validas])
+
+    #Vecinas de todo el catálogo (para calcularlas fuera de línea)
+    def precalcular(self, k=RUTAS_SIMILARES, mismo_tipo=False):
+        return self.vecinas(np.arange(len(self)), k, mismo_tipo)
+
+
+def construir_similares(rutas=None):
+    return RutasSimilares(leer_tabla(TABLA) if rutas is None else rutas)
+
+
+#Un único motor por proceso y versión de los datos, compartido por todas las sesiones
+@st.cache_resource
+def cargar_similares(version=None):
+    return construir_similares()
+
+
+def rutas_similares():
+    return cargar_similares(version_tabla(TABLA))
+
+
+if __name__ == "__main__":
+    # Vecinas de todas las rutas: python rutas_similares.py
+    motor = construir_similares()
+    vecinas, distancias = motor.precalcular()
+    vecinas_tipo, distancias_tipo = motor.precalcular(mismo_tipo=True)
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    temporal = f"{RUTA_VECINAS}.{os.getpid()}.tmp.npz"
+    np.savez(temporal, version=version_tabla(TABLA), vecinas=vecinas, distancias=distancias,
+             vecinas_tipo=vecinas_tipo, distancias_tipo=distancias_tipo)
+    os.replace(temporal, RUTA_VECINAS)
+    print(f"{len(motor)} rutas: {RUTA_VECINAS}")
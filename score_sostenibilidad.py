@@ -0,0 +1,154 @@
+from collections import deque
+import numpy as np
+import pandas as pd
+
+# Score de sostenibilidad incremental
+# Las variables por huésped (energía, residuos y agua) y el reciclaje invertido se normalizan min-max y el score es
+# 1 menos su media. El motor guarda los mínimos y máximos en curso, de modo que añadir los registros de un día
+# solo cuesta lo que esos registros; el histórico se vuelve a puntuar únicamente si un límite cambia.
+# Modos de normalización:
+#   - "historico": límites de todo el histórico (mismo resultado que un MinMaxScaler ajustado sobre todo)
+#   - "referencia": límites fijos dados (p. ej. los de un año base); nunca se vuelve a puntuar el histórico
+#   - "ventana": cada día se normaliza con los límites de los últimos `ventana` días hasta ese día
+
+VARIABLES_SCORE = ["energia_por_persona", "residuos_por_persona", "agua_por_persona", "reciclaje_invertido"]
+MODOS = ("historico", "referencia", "ventana")
+
+
+# Variables del score a partir de las columnas originales de la tabla
+def variables_score(df):
+    reservas = df["reservas_confirmadas"].replace(0, 1)
+    return pd.DataFrame({
+        "energia_por_persona": df["consumo_energia_kwh"] / reservas,
+        "residuos_por_persona": df["residuos_generados_kg"] / reservas,
+        "agua_por_persona": df["uso_agua_m3"] / reservas,
+        "reciclaje_invertido": 100 - df["porcentaje_reciclaje"],
+    }, index=df.index)
+
+
+# Límites (mínimos, máximos) de cada variable, p. ej. para fijar un año de referencia
+def limites(variables):
+    valores = np.asarray(variables, dtype=float)
+    return np.nanmin(valores, axis=0), np.nanmax(valores, axis=0)
+
+
+# Escala y desplazamiento de la normalización min-max (misma aritmética que MinMaxScaler)
+def escala_minmax(minimo, maximo):
+    rango = maximo - minimo
+    rango = np.where(rango < 10 * np.finfo(rango.dtype).eps, 1.0, rango)
+    escala = 1.0 / rango
+    return escala, -minimo * escala
+
+
+class MotorScoreSostenibilidad:
+    def __init__(self, modo="historico", referencia=None, ventana=365):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de normalización desconocido: {modo}")
+        if modo == "referencia" and referencia is None:
+            raise ValueError("El modo 'referencia' necesita los límites (mínimos, máximos)")
+        self.modo = modo
+        self.ventana = int(ventana)
+        self.n = 0
+        self.reescalados = 0  # veces que se ha vuelto a puntuar el histórico
+        self._brutos = np.empty((0, len(VARIABLES_SCORE)))
+        self._escalados = np.empty((0, len(VARIABLES_SCORE)))
+
+        if modo == "referencia":
+            self.minimo, self.maximo = (np.asarray(limite, dtype=float).copy() for limite in referencia)
+        else:
+            self.minimo = np.full(len(VARIABLES_SCORE), np.inf)
+            self.maximo = np.full(len(VARIABLES_SCORE), -np.inf)
+
+        # Modo ventana: colas monótonas con (día, valor) de los mínimos y máximos diarios de cada variable
+        self._colas_min = [deque() for _ in VARIABLES_SCORE]
+        self._colas_max = [deque() for _ in VARIABLES_SCORE]
+        self._ultimo_dia = None
+
+    @property
+    def escalados(self):
+        return self._escalados[:self.n]
+
+    @property
+    def scores(self):
+        return 1 - self.escalados.sum(axis=1) / len(VARIABLES_SCORE)
+
+    #Añadimos registros (filas de VARIABLES_SCORE) y devolvemos el score de los nuevos
+    def anadir(self, variables, fechas=None):
+        valores = np.asarray(variables, dtype=float).reshape(-1, len(VARIABLES_SCORE))
+        inicio = self.n
+        self._reservar(inicio + len(valores))
+        self._brutos[inicio:inicio + len(valores)] = valores
+        self.n += len(valores)
+
+        if self.modo == "historico":
+            self._anadir_historico(valores, inicio)
+        elif self.modo == "referencia":
+            escala, desplazamiento = escala_minmax(self.minimo, self.maximo)
+            self._escalados[inicio:self.n] = valores * escala + desplazamiento
+        else:
+            if fechas is None:
+                raise ValueError("El modo 'ventana' necesita la fecha de cada registro")
+            self._anadir_ventana(valores, inicio, fechas)
+        return self.scores[inicio:]
+
+    def _reservar(self, capacidad):
+        if capacidad <= len(self._brutos):
+            return
+        capacidad = max(capacidad, 2 * len(self._brutos))
+        for nombre in ("_brutos", "_escalados"):
+            ampliado = np.empty((capacidad, len(VARIABLES_SCORE)))
+            ampliado[:self.n] = getattr(self, nombre)[:self.n]
+            setattr(self, nombre, ampliado)
+
+    def _anadir_historico(self, valores, inicio):
+        minimo = np.fmin(self.minimo, np.nanmin(valores, axis=0)) if len(valores) else self.minimo
+        maximo = np.fmax(self.maximo, np.nanmax(valores, axis=0)) if len(valores) else self.maximo
+        # Si algún límite se mueve, el histórico entero cambia de escala; si no, basta con los nuevos
+        if inicio and not (np.array_equal(minimo, self.minimo) and np.array_equal(maximo, self.maximo)):
+            inicio = 0
+            self.reescalados += 1
+        self.minimo, self.maximo = minimo, maximo
+        escala, desplazamiento = escala_minmax(minimo, maximo)
+        self._escalados[inicio:self.n] = self._brutos[inicio:self.n] * escala + desplazamiento
+
+    def _anadir_ventana(self, valores, inicio, fechas):
+        dias = pd.DatetimeIndex(fechas).to_numpy().astype("datetime64[D]").astype(np.int64)
+        orden = np.argsort(dias, kind="stable")
+        if self._ultimo_dia is not None and len(dias) and dias[orden[0]] < self._ultimo_dia:
+            raise ValueError("En el modo 'ventana' los registros deben llegar en orden cronológico")
+
+        dias_ordenados = dias[orden]
+        cortes = np.flatnonzero(np.diff(dias_ordenados)) + 1
+        for grupo in np.split(orden, cortes):
+            if not len(grupo):
+                continue
+            dia = dias[grupo[0]]
+            self._actualizar_colas(dia, np.nanmin(valores[grupo], axis=0), np.nanmax(valores[grupo], axis=0))
+            self.minimo = np.array([cola[0][1] for cola in self._colas_min])
+            self.maximo = np.array([cola[0][1] for cola in self._colas_max])
+            escala, desplazamiento = escala_minmax(self.minimo, self.maximo)
+            self._escalados[inicio + grupo] = valores[grupo] * escala + desplazamiento
+            self._ultimo_dia = dia
+
+    #Ventana deslizante de mínimos y máximos: coste amortizado constante por día y variable
+    def _actualizar_colas(self, dia, minimos, maximos):
+        for j in range(len(VARIABLES_SCORE)):
+            for cola, valor, sustituye in ((self._colas_min[j], minimos[j], np.less_equal),
+                                           (self._colas_max[j], maximos[j], np.greater_equal)):
+                if cola and cola[-1][0] == dia:
+                    valor = valor if sustituye(valor, cola[-1][1]) else cola[-1][1]
+                    cola.pop()
+                while cola and sustituye(valor, cola[-1][1]):
+                    cola.pop()
+                cola.append((dia, valor))
+                while cola[0][0] <= dia - self.ventana:
+                    cola.popleft()
+
+
+# Score de una tabla completa; añade las variables normalizadas y la columna sostenibilidad_score
+def puntuar(df, modo="historico", referencia=None, ventana=365):
+    motor = MotorScoreSostenibilidad(modo, referencia, ventana)
+    motor.anadir(variables_score(df).to_numpy(), df["fecha"] if modo == "ventana" else None)
+    df[VARIABLES_SCORE] = motor.escalados
+    df["sostenibilidad_score"] = motor.scores
+    return motor
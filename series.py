@@ -1,40 +1,105 @@
+import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
-from prophet import Prophet
+from datos import DIR_DATOS, leer_tabla
+from forecaster_fourier import ForecasterFourier
 
-# 1. Cargar el dataset y convertir la columna 'fecha' a datetime
-df = pd.read_csv('ocupacion_hotelera.csv', parse_dates=['fecha'])
+# Predicción de la tasa de ocupación diaria de cada hotel
+# Dos motores: Prophet (cada hotel se ajusta en un proceso del pool) o la regresión de Fourier de
+# forecaster_fourier.py (todos los hoteles a la vez). El resultado se escribe en
+# baseDatos/predicciones_hoteles_<año>.csv (un fichero por año completo; ver ficheros_predicciones) con el mismo
+# formato que lee hoteles.py (una columna por hotel y las fechas como índice).
+# Uso: python series.py [--motor prophet|fourier] [--inicio 2025-01-01] [--fin 2025-12-31] [--n-jobs N]
 
-# 2. Eliminar datos de los años 2019 y 2020 (por considerarse atípicos)
-df = df[~df['fecha'].dt.year.isin([2019, 2020])]
+# Años que se descartan por considerarse atípicos
+AÑOS_EXCLUIDOS = [2019, 2020]
+MOTORES = ("prophet", "fourier")
 
-# 3. Obtener la lista de hoteles únicos
-hoteles = df['hotel_nombre'].unique()
 
-# 4. Crear un DataFrame futuro con las fechas de 2025 (predicción diaria)
-fechas_futuras = pd.date_range(start='2025-01-01', end='2025-12-31', freq='D')
-df_futuro = pd.DataFrame({'ds': fechas_futuras})
+# Ajustamos el modelo Prophet de un hotel y devolvemos su pronóstico para las fechas futuras
+def ajustar_hotel(hotel, df_prophet, fechas_futuras):
+    from prophet import Prophet
 
-# 5. Inicializar un DataFrame para almacenar los resultados con índice de fechas de 2025
-df_resultados = pd.DataFrame(index=fechas_futuras)
-
-# 6. Iterar sobre cada hotel y ajustar el modelo Prophet
-for hotel in hoteles:
-    # Filtrar datos para el hotel actual
-    df_hotel = df[df['hotel_nombre'] == hotel].copy()
-    # Preparar datos para Prophet (columnas "ds" y "y")
-    df_prophet = df_hotel[['fecha', 'tasa_ocupacion']].rename(columns={'fecha': 'ds', 'tasa_ocupacion': 'y'})
-    
     # Crear y ajustar el modelo Prophet con estacionalidades semanal y anual, y agregar estacionalidad mensual
     modelo = Prophet(weekly_seasonality=True, yearly_seasonality=True)
     modelo.add_seasonality(name='mensual', period=30.5, fourier_order=5)
     modelo.fit(df_prophet)
-    
-    # Realizar el pronóstico para el año 2025
-    pronostico = modelo.predict(df_futuro)
-    
-    # Guardar en el DataFrame la ocupación prevista para el hotel actual
-    df_resultados[hotel] = pronostico['yhat'].values
 
+    pronostico = modelo.predict(pd.DataFrame({'ds': fechas_futuras}))
+    return hotel, pronostico['yhat'].values
+
+
+# Datos de entrenamiento: ocupación diaria sin los años atípicos
+def cargar_ocupacion():
+    # 1. Cargar el dataset (fechas ya convertidas a datetime)
+    df = leer_tabla("ocupacion_hotelera")
+
+    # 2. Eliminar datos de los años atípicos
+    return df[~df['fecha'].dt.year.isin(AÑOS_EXCLUIDOS)]
+
+
+def predecir_ocupacion_prophet(df, inicio, fin, n_jobs=None):
+    # 3. Obtener la lista de hoteles únicos (en el orden en que aparecen en los datos)
+    hoteles = [str(hotel) for hotel in df['hotel_nombre'].unique()]
+
+    # 4. Fechas futuras de la predicción diaria
+    fechas_futuras = pd.date_range(start=inicio, end=fin, freq='D')
+
+    # 5. Preparar los datos de cada hotel para Prophet (columnas "ds" y "y") y ajustar los modelos en paralelo
+    series = {
+        str(hotel): df_hotel[['fecha', 'tasa_ocupacion']].rename(columns={'fecha': 'ds', 'tasa_ocupacion': 'y'})
+        for hotel, df_hotel in df.groupby('hotel_nombre', observed=True)
+    }
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        tareas = [pool.submit(ajustar_hotel, hotel, series[hotel], fechas_futuras) for hotel in hoteles]
+        pronosticos = dict(tarea.result() for tarea in tareas)
+
+    # 6. Construir de una vez el DataFrame de resultados con índice de fechas
+    return pd.DataFrame({hotel: pronosticos[hotel] for hotel in hoteles}, index=fechas_futuras)
+
+
+# Todos los hoteles con una única matriz de diseño y un solo mínimos cuadrados
+def predecir_ocupacion_fourier(df, inicio, fin):
+    hoteles = [str(hotel) for hotel in df['hotel_nombre'].unique()]
+    Y = df.pivot(index='fecha', columns='hotel_nombre', values='tasa_ocupacion')
+    Y.columns = Y.columns.astype(str)
+    forecaster = ForecasterFourier().ajustar(Y[hoteles])
+    return forecaster.predecir(pd.date_range(start=inicio, end=fin, freq='D'))
+
+
+def predecir_ocupacion(inicio, fin, n_jobs=None, motor="prophet", df=None):
+    df = cargar_ocupacion() if df is None else df
+    if motor == "fourier":
+        return predecir_ocupacion_fourier(df, inicio, fin)
+    return predecir_ocupacion_prophet(df, inicio, fin, n_jobs)
+
+
+# Ficheros de salida según el horizonte: uno por año natural completo (predicciones_hoteles_2025.csv, el que leen
+# las páginas con leer_predicciones(año)). Un horizonte parcial va a su propio fichero con las fechas en el nombre
+# (predicciones_hoteles_2025-06-01_2025-12-31.csv, legible con leer_tabla) para no pisar el del año completo.
+# Devuelve {ruta: (primer día, último día)}
+def ficheros_predicciones(inicio, fin, directorio=DIR_DATOS):
+    inicio, fin = pd.Timestamp(inicio), pd.Timestamp(fin)
+    if (inicio.month, inicio.day) == (1, 1) and (fin.month, fin.day) == (12, 31):
+        return {
+            os.path.join(directorio, f"predicciones_hoteles_{año}.csv"): (pd.Timestamp(año, 1, 1), pd.Timestamp(año, 12, 31))
+            for año in range(inicio.year, fin.year + 1)
+        }
+    return {os.path.join(directorio, f"predicciones_hoteles_{inicio:%Y-%m-%d}_{fin:%Y-%m-%d}.csv"): (inicio, fin)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Predice la tasa de ocupación diaria de cada hotel.")
+    parser.add_argument("--motor", choices=MOTORES, default="prophet", help="Motor de predicción")
+    parser.add_argument("--inicio", default="2025-01-01", help="Primer día del horizonte de predicción")
+    parser.add_argument("--fin", default="2025-12-31", help="Último día del horizonte de predicción")
+    parser.add_argument("--n-jobs", type=int, default=None, help="Procesos en paralelo (por defecto, todos los núcleos)")
+    parser.add_argument("--salida", default=DIR_DATOS, help="Directorio donde se escribe el CSV de predicciones")
+    args = parser.parse_args()
 
-print(df_resultados)
-df_resultados.to_csv("../Basedatos/predicciones_hoteles_2025.csv", index=True)
\ No newline at end of file
+    df_resultados = predecir_ocupacion(args.inicio, args.fin, args.n_jobs, args.motor)
+    print(df_resultados)
+    for ruta, (desde, hasta) in ficheros_predicciones(args.inicio, args.fin, args.salida).items():
+        df_resultados.loc[desde:hasta].to_csv(ruta, index=True)
+        print(ruta)
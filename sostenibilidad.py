@@ -1,88 +1,111 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
-from sklearn.preprocessing import MinMaxScaler
+from datos import leer_tabla, version_tabla
+from cubo_metricas import TABLA_ORIGEN, cubo
+from score_sostenibilidad import puntuar
+from cache_graficos import clave_grafico, mostrar_grafico
 
 # ----------- CARGA Y PREPROCESADO ----------- #
 @st.cache_data
 def cargar_datos():
-    df = pd.read_csv("baseDatos/sostenibilidad_ocupacion.csv")
-    df["fecha"] = pd.to_datetime(df["fecha"])
+    df = leer_tabla("sostenibilidad_ocupacion")
 
     # Preprocesado
     df["reservas_confirmadas"] = df["reservas_confirmadas"].replace(0, 1)
 
-    df["energia_por_persona"] = df["consumo_energia_kwh"] / df["reservas_confirmadas"]
-    df["residuos_por_persona"] = df["residuos_generados_kg"] / df["reservas_confirmadas"]
-    df["agua_por_persona"] = df["uso_agua_m3"] / df["reservas_confirmadas"]
-    df["reciclaje_invertido"] = 100 - df["porcentaje_reciclaje"]
-
-    # Score de sostenibilidad
-    vars_score = ["energia_por_persona", "residuos_por_persona", "agua_por_persona", "reciclaje_invertido"]
-    scaler = MinMaxScaler()
-    df[vars_score] = scaler.fit_transform(df[vars_score])
-    df["sostenibilidad_score"] = 1 - df[vars_score].mean(axis=1)
+    # Score de sostenibilidad (variables por huésped normalizadas; ver score_sostenibilidad.py)
+    puntuar(df)
 
     return df
 
+# Resumen mensual de todos los hoteles a la vez: una fila por (hotel, año, mes)
+@st.cache_data
+def cargar_resumenes_mensuales():
+    df = cargar_datos()
+    claves = [df["hotel_nombre"], df["fecha"].dt.year.rename("año"), df["fecha"].dt.month.rename("mes")]
+    return df.groupby(claves, observed=True).agg(
+        score=("sostenibilidad_score", "mean"),
+        energia=("consumo_energia_kwh", "sum"),
+        residuos=("residuos_generados_kg", "sum"),
+        agua=("uso_agua_m3", "sum"),
+        reciclaje=("porcentaje_reciclaje", "mean"),
+        reservas=("reservas_confirmadas", "sum"),
+    )
+
+# Perfil de reservas por tramos del mes: media por año de reservas confirmadas y cancelaciones de cada
+# (hotel, mes, tramo), para todos los hoteles a la vez. Los tramos son los días 1-10, 11-20 y 21-31.
+TRAMOS = ["Días 1-10", "Días 11-20", "Días 21-31"]
+
+@st.cache_data
+def cargar_perfil_tramos(version=None):
+    cubo_hoteles = cubo()
+    metricas = ["reservas_confirmadas", "cancelaciones"]
+    valores = np.asarray(cubo_hoteles.valores[:, :, [cubo_hoteles.indice_metrica[m] for m in metricas]])
+    validos = ~np.isnan(valores).any(axis=2)  # [hotel, día]
+
+    # Cada día del eje de fechas va a una celda (mes, tramo); la suma por celda es un producto de matrices
+    fechas = cubo_hoteles.fechas
+    celda = (fechas.month.to_numpy() - 1) * len(TRAMOS) + np.minimum((fechas.day.to_numpy() - 1) // 10, 2)
+    por_celda = np.zeros((len(fechas), 12 * len(TRAMOS)))
+    por_celda[np.arange(len(fechas)), celda] = 1
+    sumas = np.einsum("hdm,dc->hcm", np.where(validos[:, :, None], valores, 0), por_celda)
+
+    # Años con algún dato de cada (hotel, mes)
+    años = fechas.year.to_numpy()
+    mes_año = (fechas.month.to_numpy() - 1) * (años.max() - años.min() + 1) + (años - años.min())
+    por_mes_año = np.zeros((len(fechas), 12 * (años.max() - años.min() + 1)))
+    por_mes_año[np.arange(len(fechas)), mes_año] = 1
+    n_años = ((validos @ por_mes_año) > 0).reshape(len(cubo_hoteles.hoteles), 12, -1).sum(axis=2)
+    n_años = np.repeat(n_años, len(TRAMOS), axis=1)  # [hotel, celda]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        medias = sumas / n_años[:, :, None]
+    indice = pd.MultiIndex.from_product(
+        [cubo_hoteles.hoteles, range(1, 13), TRAMOS], names=["hotel_nombre", "mes", "tramo"]
+    )
+    return pd.DataFrame({
+        "reservas_confirmadas": medias[:, :, 0].ravel(),
+        "cancelaciones": medias[:, :, 1].ravel(),
+        "años": n_años.ravel(),
+    }, index=indice)
+
+
+def perfil_tramos():
+    return cargar_perfil_tramos(version_tabla(TABLA_ORIGEN))
+
 # ----------- FUNCIONES ----------- #
-def obtener_resumen_mensual(df, hotel, mes, año):
+def obtener_resumen_mensual(resumenes, hotel, mes, año):
     mes_str = str(mes).zfill(2)
     periodo = f"{año}-{mes_str}"
-    df["mes"] = df["fecha"].dt.to_period("M").astype(str)
-    datos = df[(df["hotel_nombre"] == hotel) & (df["mes"] == periodo)]
-
-    if datos.empty:
+    clave = (hotel, año, mes)
+    if clave not in resumenes.index:
         return None
+    # Columna a columna para conservar los tipos (las sumas siguen siendo enteras)
+    datos = {columna: resumenes.at[clave, columna] for columna in resumenes.columns}
 
     return {
         "periodo": periodo,
-        "score": round(datos["sostenibilidad_score"].mean(), 2),
-        "energia": round(datos["consumo_energia_kwh"].sum(), 2),
-        "residuos": round(datos["residuos_generados_kg"].sum(), 2),
-        "agua": round(datos["uso_agua_m3"].sum(), 2),
-        "reciclaje": round(datos["porcentaje_reciclaje"].mean(), 2),
-        "reservas": datos["reservas_confirmadas"].sum()
+        "score": round(datos["score"], 2),
+        "energia": round(datos["energia"], 2),
+        "residuos": round(datos["residuos"], 2),
+        "agua": round(datos["agua"], 2),
+        "reciclaje": round(datos["reciclaje"], 2),
+        "reservas": datos["reservas"]
     }
 
-def ocupacion_semanal(df, hotel, mes):
-
-    df_filtrado = df[(df["hotel_nombre"] == hotel) & 
-                     (df["fecha"].dt.month == mes)].copy()
-
-    if df_filtrado.empty:
-        st.info("No hay datos históricos para ese hotel y mes.")
-        return
-
-    df_filtrado["año"] = df_filtrado["fecha"].dt.year
-    df_filtrado["dia"] = df_filtrado["fecha"].dt.day
-
-    # Crear columna de tramo: 1-10, 11-20, 21-31
-    def clasificar_tramo(dia):
-        if dia <= 10:
-            return "Días 1-10"
-        elif dia <= 20:
-            return "Días 11-20"
-        else:
-            return "Días 21-31"
-
-    df_filtrado["tramo"] = df_filtrado["dia"].apply(clasificar_tramo)
-    # Sumar por tramo
-    agrupado = df_filtrado.groupby("tramo")[["reservas_confirmadas", "cancelaciones"]].sum().reset_index()
-
-    # Hacer la media
-    n_años = df_filtrado["año"].nunique()
-    agrupado["Reservas Confirmadas"] = (agrupado["reservas_confirmadas"] / n_años).astype(int)
-    agrupado["Cancelaciones"] = (agrupado["cancelaciones"] / n_años).astype(int)
-
+def fig_ocupacion_semanal(agrupado):
+    agrupado = agrupado.reset_index()
+    agrupado["Reservas Confirmadas"] = agrupado["reservas_confirmadas"].astype(int)
+    agrupado["Cancelaciones"] = agrupado["cancelaciones"].astype(int)
 
     resumen = agrupado[["tramo", "Reservas Confirmadas", "Cancelaciones"]]
     resumen = pd.melt(resumen, id_vars="tramo", var_name="Tipo", value_name="Promedio")
 
     # Ordenar los tramos de forma lógica
-    orden_tramos = ["Días 1-10", "Días 11-20", "Días 21-31"]
-    resumen["tramo"] = pd.Categorical(resumen["tramo"], categories=orden_tramos, ordered=True)
+    resumen["tramo"] = pd.Categorical(resumen["tramo"], categories=TRAMOS, ordered=True)
 
     # Gráfico
     custom_params = {"axes.spines.right": False, "axes.spines.top": False}
@@ -91,7 +114,7 @@ def ocupacion_semanal(df, hotel, mes):
     "Reservas Confirmadas": "#FFD6A5",  
     "Cancelaciones": "#A8E6A1"    
     }
-    plt.figure(figsize=(8, 5))
+    fig = plt.figure(figsize=(8, 5))
     ax = sns.barplot(data=resumen, x="tramo", y="Promedio", hue="Tipo", palette=colores ,dodge=True, width=0.6)
     for container in ax.containers:
         ax.bar_label(container, fmt="%.1f", label_type="edge", padding=2)
@@ -99,7 +122,21 @@ def ocupacion_semanal(df, hotel, mes):
     ax.set_xlabel("")
     ax.set_ylabel("")
     plt.tight_layout()
-    st.pyplot(plt.gcf())
+    return fig
+
+def ocupacion_semanal(perfil, hotel, mes, version=None):
+
+    # Medias por tramo del hotel y mes ya calculadas en el perfil
+    try:
+        agrupado = perfil.loc[(hotel, mes)]
+    except KeyError:
+        agrupado = None
+    if agrupado is None or agrupado["años"].iloc[0] == 0:
+        st.info("No hay datos históricos para ese hotel y mes.")
+        return
+
+    clave = clave_grafico("ocupacion_semanal", hotel, None, mes, None, version)
+    mostrar_grafico(clave, lambda: fig_ocupacion_semanal(agrupado))
 
 
 # ----------- INTERFAZ PRINCIPAL ----------- #
@@ -128,7 +165,7 @@ def app(change_page_func):
     año_sel = st.selectbox("📅 Año", años)
     mes_sel = st.selectbox("📆 Mes", list(range(1, 13)), format_func=lambda m: f"{m:02d}")
 
-    resumen = obtener_resumen_mensual(df, hotel_sel, mes_sel, año_sel)
+    resumen = obtener_resumen_mensual(cargar_resumenes_mensuales(), hotel_sel, mes_sel, año_sel)
 
     if resumen:
         st.markdown(f"### 📊 Informe para **{hotel_sel}** en **{resumen['periodo']}**")
@@ -148,7 +185,7 @@ def app(change_page_func):
                     6: "Junio", 7: "Julio",8: "Agosto",9: "Septiembre",10: "Octubre",11: "Noviembre",12: "Diciembre"}
 
         st.markdown(f"### Previsión de Reservas para **{hotel_sel}** en **{meses_dict[mes_sel]}**")
-        ocupacion_semanal(df, hotel_sel, mes_sel)
+        ocupacion_semanal(perfil_tramos(), hotel_sel, mes_sel, version_tabla(TABLA_ORIGEN))
         
     else:
         st.warning("No hay datos para ese hotel y mes.")
@@ -0,0 +1,137 @@
+import os
+import numpy as np
+import streamlit as st
+from registro_modelos import PREFERENCIAS, RegistroModelos, huella_modelos, registro, version_modelos
+
+# Tabla materializada de respuestas del predictor de transporte
+# El espacio de entrada es finito (origen × destino × 12 meses × 7 días de la semana por preferencia), así que
+# se evalúan todas las combinaciones una vez, fuera de línea, y la página responde con una consulta a un array.
+# Si una combinación no está en la tabla (o la tabla no existe o es de otros modelos) se usan los modelos.
+
+#Asignamos un score de sostenibilidad a cada medio de transporte
+SOSTENIBILIDAD_TRANSPORTE = {
+    'Bicicleta': 5,
+    'Tranvía': 4,
+    'Metro': 4,
+    'Autobús': 3,
+    'Coche Compartido': 2,
+    'Avion': 1
+}
+
+
+#Predicción de un lote de entradas codificadas con los modelos de una preferencia
+def predecir_lote(paquete, origen_enc, destino_enc, mes, dia_semana):
+    X = np.column_stack([origen_enc, destino_enc, mes, dia_semana])
+    transporte_enc = paquete.clf.predict(X)
+    transporte = paquete.le_transporte.inverse_transform(transporte_enc)
+    tiempo = paquete.reg_time.predict(X)
+    usuarios = paquete.reg_users.predict(X)
+    eco = np.array([SOSTENIBILIDAD_TRANSPORTE.get(t, 3) for t in transporte])
+    return transporte, tiempo, usuarios, eco
+
+
+def ruta_tabla(directorio, preferencia):
+    return os.path.join(directorio, f"tabla_respuestas_{preferencia}.npz")
+
+
+class TablaRespuestas:
+    def __init__(self, datos):
+        self.origenes = {o: i for i, o in enumerate(datos["origenes"])}
+        self.destinos = {d: i for i, d in enumerate(datos["destinos"])}
+        self.transportes = datos["transportes"]
+        # Arrays [origen, destino, mes - 1, día de la semana]
+        self.transporte = datos["transporte"]
+        self.tiempo = datos["tiempo"]
+        self.usuarios = datos["usuarios"]
+        self.eco = datos["eco"]
+
+    def consultar(self, origen, destino, mes, dia_semana):
+        i = self.origenes.get(origen)
+        j = self.destinos.get(destino)
+        if i is None or j is None:
+            return None
+        clave = (i, j, mes - 1, dia_semana)
+        return {
+            'transporte_recomendado': str(self.transportes[self.transporte[clave]]),
+            'tiempo_estimado_min': int(self.tiempo[clave]),
+            'usuarios_estimados': int(self.usuarios[clave]),
+            'sostenibilidad_nivel': int(self.eco[clave])
+        }
+
+
+#Evaluamos todas las combinaciones de una preferencia y guardamos la tabla
+def construir_tabla(registro_modelos, preferencia):
+    paquete = registro_modelos.obtener(preferencia)
+    origenes = paquete.le_origen.classes_
+    destinos = paquete.le_destino.classes_
+    forma = (len(origenes), len(destinos), 12, 7)
+
+    o, d, m, s = (eje.ravel() for eje in np.indices(forma))
+    transporte, tiempo, usuarios, eco = predecir_lote(paquete, o, d, m + 1, s)
+
+    transportes = paquete.le_transporte.classes_
+    datos = {
+        "origenes": origenes.astype(str),
+        "destinos": destinos.astype(str),
+        "transportes": transportes.astype(str),
+        "transporte": np.searchsorted(transportes, transporte).astype(np.int8).reshape(forma),
+        # Mismo redondeo que la predicción en vivo
+        "tiempo": np.array([int(round(t)) for t in tiempo], dtype=np.int32).reshape(forma),
+        "usuarios": usuarios.astype(np.int32).reshape(forma),
+        "eco": eco.astype(np.int8).reshape(forma),
+        "huella": huella_modelos(registro_modelos.directorio, preferencia),
+    }
+    destino = ruta_tabla(registro_modelos.directorio, preferencia)
+    temporal = f"{destino}.{os.getpid()}.tmp.npz"
+    np.savez(temporal, **datos)
+    os.replace(temporal, destino)
+    return destino
+
+
+#Abrimos la tabla de una preferencia si existe y corresponde a los modelos actuales
+def abrir_tabla(directorio, preferencia):
+    ruta = ruta_tabla(directorio, preferencia)
+    if not os.path.exists(ruta):
+        return None
+    with np.load(ruta, allow_pickle=False) as datos:
+        datos = dict(datos)
+    try:
+        if not np.array_equal(datos["huella"], huella_modelos(directorio, preferencia)):
+            return None
+    except FileNotFoundError:
+        pass  # La tabla puede servirse aunque los modelos no estén desplegados
+    return TablaRespuestas(datos)
+
+
+#Versión de las tablas: fecha de modificación de cada tabla y huella de sus modelos (cambia al reconstruir una
+#tabla o reentrenar los modelos)
+def version_tablas(directorio):
+    tablas = tuple(os.stat(ruta).st_mtime_ns if os.path.exists(ruta) else None
+                   for ruta in (ruta_tabla(directorio, preferencia) for preferencia in PREFERENCIAS))
+    return tablas, version_modelos(directorio)
+
+
+#Unas únicas tablas por proceso y versión, compartidas por todas las sesiones
+@st.cache_resource
+def cargar_tablas(version=None):
+    directorio = registro().directorio
+    return {preferencia: abrir_tabla(directorio, preferencia) for preferencia in PREFERENCIAS}
+
+
+def tablas_respuestas():
+    return cargar_tablas(version_tablas(registro().directorio))
+
+
+#Respuesta materializada, o None si hay que recurrir a los modelos
+def consultar(preferencia, origen, destino, mes, dia_semana):
+    tabla = tablas_respuestas().get(preferencia.lower())
+    if tabla is None:
+        return None
+    return tabla.consultar(origen, destino, mes, dia_semana)
+
+
+if __name__ == "__main__":
+    # Construcción de las tablas de respuestas: python tabla_transporte.py
+    reg = RegistroModelos()
+    for preferencia in PREFERENCIAS:
+        print(f"{preferencia}: {construir_tabla(reg, preferencia)}")